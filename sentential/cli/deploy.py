@@ -11,13 +11,24 @@ from sentential.lib.shapes import Architecture
 
 deploy = typer.Typer()
 
+BAKE_ENVS_HELP = "set envs as function environment variables, only secrets are read from ssm at cold start"
+
 
 @deploy.command()
-def local(tag: str = typer.Argument(None), public_url: bool = typer.Option(False)):
+def local(
+    tag: str = typer.Argument(None),
+    public_url: bool = typer.Option(False),
+    bake_envs: bool = typer.Option(False, help=BAKE_ENVS_HELP),
+    cache_parameters: bool = typer.Option(
+        False,
+        help="serve envs and secrets to the container from a local sidecar, the local store backend sets them as environment variables instead",
+    ),
+):
     """deploy local lambda container"""
     ontology = Ontology()
     image = LocalImagesDriver(ontology).get_image(tag)
-    print(LocalLambdaDriver(ontology).deploy(image))
+    driver = LocalLambdaDriver(ontology)
+    print(driver.deploy(image, bake_envs=bake_envs, cache_parameters=cache_parameters))
 
     if public_url:
         LocalLambdaPublicUrlMount(ontology).mount()
@@ -30,11 +41,12 @@ def aws(
     tag: str = typer.Argument(None),
     arch: Architecture = typer.Option(None),
     public_url: bool = typer.Option(False),
+    bake_envs: bool = typer.Option(False, help=BAKE_ENVS_HELP),
 ):
     """deploy lambda image to aws"""
     ontology = Ontology()
     image = AwsEcrDriver(ontology).get_image(tag)
-    print(AwsLambdaDriver(ontology).deploy(image, arch))
+    print(AwsLambdaDriver(ontology).deploy(image, arch, bake_envs))
 
     if public_url:
         AwsLambdaPublicUrlMount(ontology).mount()
@@ -3,7 +3,9 @@ from sentential.lib.drivers.local_lambda import LocalLambdaDriver
 from sentential.lib.drivers.aws_lambda import AwsLambdaDriver
 from sentential.lib.mounts.aws_event_schedule import AwsEventScheduleMount
 from sentential.lib.mounts.aws_api_gateway import AwsApiGatewayMount
+from sentential.lib.backends import store_backend
 from sentential.lib.ontology import Ontology
+from sentential.lib.shapes import StoreBackendName
 
 destroy = typer.Typer()
 
@@ -17,6 +19,9 @@ def local():
 @destroy.command()
 def aws():
     """destroy lambda deployment in aws"""
-    AwsEventScheduleMount(Ontology()).umount()
-    AwsApiGatewayMount(Ontology()).umount()
-    AwsLambdaDriver(Ontology()).destroy()
+    ontology = Ontology()
+    # mounts were configured from the ssm stores deploy aws uses, whichever backend is selected
+    ontology.backend = store_backend(ontology.context, StoreBackendName.ssm)
+    AwsEventScheduleMount(ontology).umount()
+    AwsApiGatewayMount(ontology).umount()
+    AwsLambdaDriver(ontology).destroy()
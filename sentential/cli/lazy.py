@@ -0,0 +1,74 @@
+from importlib import import_module
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+import click
+import typer
+from typer.core import TyperGroup
+
+
+class LazyTyperInfo(NamedTuple):
+    target: str  # "module.path:attribute" of a typer.Typer instance
+    name: str
+    help: str
+    callback: Optional[Callable] = None
+
+
+class LazyGroup(TyperGroup):
+    """click group which imports typer sub-apps only once their command path is resolved"""
+
+    def __init__(
+        self, *args: Any, lazy_typers: Sequence[LazyTyperInfo] = (), **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.lazy_typers: Dict[str, LazyTyperInfo] = {
+            info.name: info for info in lazy_typers
+        }
+
+    @classmethod
+    def of(cls, lazy_typers: Sequence[LazyTyperInfo]) -> Type["LazyGroup"]:
+        """group class for typer's cls=, each group it builds gets its own registry"""
+
+        class BoundLazyGroup(cls):
+            def __init__(self, *args: Any, **kwargs: Any) -> None:
+                super().__init__(*args, lazy_typers=lazy_typers, **kwargs)
+
+        return BoundLazyGroup
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(self.commands) | set(self.lazy_typers))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        # listing (help, completion) only needs name and help, which the stub carries
+        if cmd_name not in self.commands and cmd_name in self.lazy_typers:
+            return self._stub(self.lazy_typers[cmd_name])
+        return super().get_command(ctx, cmd_name)
+
+    def resolve_command(
+        self, ctx: click.Context, args: List[str]
+    ) -> Tuple[Optional[str], Optional[click.Command], List[str]]:
+        cmd_name = click.utils.make_str(args[0])
+        if cmd_name not in self.commands and cmd_name in self.lazy_typers:
+            self.add_command(self._load(self.lazy_typers[cmd_name]), cmd_name)
+        return super().resolve_command(ctx, args)
+
+    def _stub(self, info: LazyTyperInfo) -> click.Command:
+        return TyperGroup(name=info.name, help=info.help)
+
+    def _load(self, info: LazyTyperInfo) -> click.Command:
+        module, attribute = info.target.split(":")
+        sub_app: Any = getattr(import_module(module), attribute)
+        options: Dict[str, Any] = {"name": info.name, "help": info.help}
+        if info.callback:
+            options["callback"] = info.callback
+        wrapper = typer.Typer()
+        wrapper.add_typer(sub_app, **options)
+        return typer.main.get_group(wrapper).commands[info.name]
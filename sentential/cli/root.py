@@ -1,46 +1,69 @@
-from typing import List
+from os import environ
+from typing import List, Optional
 import typer
-from sentential.lib.clients import clients
-from sentential.lib.drivers.local_images import LocalImagesDriver
-from sentential.lib.drivers.local_lambda import LocalLambdaDriver
-from sentential.lib.drivers.aws_ecr import AwsEcrDriver
-from sentential.lib.drivers.aws_lambda import AwsLambdaDriver
-from sentential.lib.template import Init
-from sentential.lib.shapes import Architecture, Runtimes
-from sentential.lib.ontology import Ontology
-from sentential.lib.joinery import Joinery
+from sentential.cli.lazy import LazyGroup
+from sentential.lib.shapes import Architecture, Runtimes, StoreBackendName
 from rich import print
 
-root = typer.Typer()
+# heavy imports (drivers, jinja, python_on_whales) live in the commands that use them,
+# so resolving an unrelated command path does not pay for them.
+root = typer.Typer(cls=LazyGroup)  # sentential.sntl binds the lazy sub-apps
+
+
+@root.callback()
+def callback(
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="ignore cached identity and lookups"
+    ),
+    store_backend: Optional[StoreBackendName] = typer.Option(
+        None,
+        help="where stores are kept",
+        show_default="$SNTL_STORE_BACKEND or ssm",
+    ),
+):
+    if no_cache:
+        environ["SNTL_NO_CACHE"] = "true"
+    if store_backend:
+        environ["SNTL_STORE_BACKEND"] = store_backend.value
 
 
 @root.command()
 def init(repository_name: str, runtime: Runtimes):
     """initialize sentential project"""
+    from sentential.lib.template import Init
+
     aws_supported_image = f"public.ecr.aws/lambda/{runtime.value}:latest"
     Init(repository_name, aws_supported_image).scaffold()
 
 
 @root.command()
 def build(
-    arch: Architecture = typer.Option(Architecture.system().value),
+    arch: Architecture = typer.Option(None, show_default="host"),
     ssh_agent: bool = typer.Option(False),
 ):
     """build lambda image"""
+    from sentential.lib.ontology import Ontology
+    from sentential.lib.drivers.local_images import LocalImagesDriver
+    from sentential.lib.drivers.local_lambda import LocalLambdaDriver
+
     ontology = Ontology()
     LocalLambdaDriver(ontology).destroy()
-    LocalImagesDriver(ontology).build(arch, ssh_agent)
+    LocalImagesDriver(ontology).build(arch or Architecture.system(), ssh_agent)
 
 
 @root.command()
 def publish(
     major: bool = typer.Option(False),
     minor: bool = typer.Option(False),
-    arch: List[Architecture] = typer.Option([Architecture.system().value]),
+    arch: List[Architecture] = typer.Option([], show_default="host"),
     multiarch: bool = typer.Option(False),
     ssh_agent: bool = typer.Option(False),
 ):
     """publish lambda image"""
+    from sentential.lib.ontology import Ontology
+    from sentential.lib.drivers.aws_ecr import AwsEcrDriver
+    from sentential.lib.drivers.local_images import LocalImagesDriver
+
     ontology = Ontology()
     tag = AwsEcrDriver(ontology).next(major, minor)
     docker = LocalImagesDriver(ontology)
@@ -48,19 +71,32 @@ def publish(
     if multiarch:
         docker.publish(tag, [a for a in Architecture], ssh_agent)
     else:
-        docker.publish(tag, [a for a in arch], ssh_agent)
+        docker.publish(tag, [a for a in arch] or [Architecture.system()], ssh_agent)
 
 
 @root.command()
 def login():
     """login to ecr"""
+    from sentential.lib.clients import clients
+
     clients.docker.login_ecr()
 
 
 @root.command()
-def ls(verbose: bool = typer.Option(False)):
+def ls(
+    verbose: bool = typer.Option(False),
+    limit: int = typer.Option(0, help="newest builds to show, 0 for all"),
+    since: str = typer.Option("", help="only builds from this version or iso date"),
+    deployed_only: bool = typer.Option(False),
+):
     """list image information"""
-    print(Joinery(Ontology()).list(verbose))
+    from sentential.lib.ontology import Ontology
+    from sentential.lib.joinery import Joinery
+
+    joinery = Joinery(Ontology(), limit, since, deployed_only)
+    print(joinery.list(verbose))
+    if verbose:
+        print(joinery.timing())
 
 
 @root.command()
@@ -68,15 +104,28 @@ def clean(
     remote: bool = typer.Option(False),
     remote_logs: bool = typer.Option(False),
     stores: bool = typer.Option(False),
+    keep_last: int = typer.Option(0, help="remote builds to keep, newest first"),
+    older_than: int = typer.Option(0, help="only remove remote images older (days)"),
+    keep_deployed: bool = typer.Option(False),
 ):
     """clean images (and logs)"""
+    from sentential.lib.ontology import Ontology
+    from sentential.lib.drivers.aws_ecr import AwsEcrDriver
+    from sentential.lib.drivers.aws_lambda import AwsLambdaDriver
+    from sentential.lib.drivers.local_images import LocalImagesDriver
+
     ontology = Ontology()
     LocalImagesDriver(ontology).clean()
     if remote:
-        AwsEcrDriver(ontology).clean()
+        deployed = (
+            AwsLambdaDriver(ontology).deployed_digest() if keep_deployed else None
+        )
+        removed = AwsEcrDriver(ontology).clean(keep_last, older_than, deployed)
+        reclaimed = sum(image.imageSizeInBytes or 0 for image in removed)
+        print(f"removed {len(removed)} remote images, reclaimed {reclaimed} bytes")
     if (
         remote_logs
     ):  # MAYBE: is it time to graduate to `clean local` and `clean remote`?
         AwsLambdaDriver(ontology).clean()
     if stores:
-        Ontology().clear_stores()
+        ontology.clear_stores()
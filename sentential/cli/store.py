@@ -1,24 +1,42 @@
+import sys
+import json
 import typer
 from rich import print
-from typing import List, Tuple, Callable
+from pathlib import PosixPath
+from typing import List, Optional, Tuple, Callable
 from sentential.lib.store import Store
+from sentential.lib.backends import store_backend
 from sentential.lib.ontology import Ontology
+from sentential.lib.shapes import StoreFormat, StoreOutput
+from sentential.lib.values import dump_values, load_values, parse_pairs
 
 store = typer.Typer()
 
+# command name -> Store method, where the two cannot match
+METHODS = {"import": "merge"}
+
 
 def _from_context(ctx: typer.Context) -> Tuple[Store, Callable]:
     zero_arg, store, method, *n_arg = ctx.command_path.split(" ")
     store = getattr(Ontology(), store)
-    method = getattr(store, method)
+    method = getattr(store, METHODS.get(method, method))
     return (store, method)
 
 
 @store.command()
-def ls(ctx: typer.Context):
+def ls(ctx: typer.Context, output: StoreOutput = typer.Option(StoreOutput.table)):
     """list store"""
     store, method = _from_context(ctx)
-    print(method())
+    if output == StoreOutput.table:
+        print(method())
+        return
+
+    rows = [row.dict() for row in store.rows()]
+    if output == StoreOutput.json:
+        typer.echo(json.dumps(rows, default=str))
+    else:
+        for row in rows:
+            typer.echo(json.dumps(row, default=str))
 
 
 @store.command()
@@ -40,3 +58,75 @@ def clear(ctx: typer.Context):
     """delete all in store"""
     store, method = _from_context(ctx)
     print(method())
+
+
+@store.command("import")
+def import_(
+    ctx: typer.Context,
+    pairs: List[str] = typer.Argument(None, help="KEY=VALUE pairs, override the file"),
+    file: Optional[str] = typer.Option(
+        None, "--file", "-f", help=".env, json or yaml file, - for stdin"
+    ),
+    format: Optional[StoreFormat] = typer.Option(
+        None, help="format of --file  [default: from file extension, env for stdin]"
+    ),
+):
+    """set many KEY=VALUE in store with a single write"""
+    store, method = _from_context(ctx)
+    values = {}
+    if file == "-":
+        values = load_values(sys.stdin.read(), format or StoreFormat.env)
+    elif file:
+        text = PosixPath(file).read_text()
+        values = load_values(text, format or StoreFormat.from_path(file))
+    values.update(parse_pairs(pairs or []))
+    print(method(values))
+
+
+@store.command()
+def export(
+    ctx: typer.Context,
+    format: StoreFormat = typer.Option(StoreFormat.json),
+):
+    """print whole store"""
+    store, method = _from_context(ctx)
+    typer.echo(dump_values(method(), format))
+
+
+@store.command()
+def sync(
+    ctx: typer.Context,
+    source: str = typer.Option(..., "--from", help="partition to copy from"),
+    to: str = typer.Option(..., help="comma separated partitions, or all"),
+    merge: bool = typer.Option(False, help="keep keys only the target has"),
+    key: List[str] = typer.Option([], help="only copy KEY, merged into the target"),
+    workers: int = typer.Option(8, help="partitions written concurrently"),
+):
+    """copy store across partitions"""
+    store, method = _from_context(ctx)
+    targets = [target.strip() for target in to.split(",") if target.strip()]
+    print(method(source, targets, merge, key, workers))
+
+
+def _sync(ctx: typer.Context, source: str, target: str, all: bool) -> str:
+    zero_arg, name, *n_arg = ctx.command_path.split(" ")
+    ontology = Ontology()
+    stores = ontology.stores if all else [getattr(ontology, name)]
+    written = ontology.sync_stores(
+        store_backend(ontology.context, source),
+        store_backend(ontology.context, target),
+        stores,
+    )
+    return f"{source} -> {target}: {written} of {len(stores)} stores written"
+
+
+@store.command()
+def pull(ctx: typer.Context, all: bool = typer.Option(False, help="every store")):
+    """copy store from ssm to the local backend"""
+    print(_sync(ctx, "ssm", "local", all))
+
+
+@store.command()
+def push(ctx: typer.Context, all: bool = typer.Option(False, help="every store")):
+    """copy store from the local backend to ssm"""
+    print(_sync(ctx, "local", "ssm", all))
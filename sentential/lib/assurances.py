@@ -2,7 +2,7 @@ from os.path import exists
 from os import getcwd
 import json
 from sentential.lib.exceptions import SntlException
-from sentential.lib.clients import clients
+from sentential.lib.dockerfile import load_dockerfile
 
 
 class Assurances:
@@ -29,12 +29,7 @@ class Assurances:
 
     @classmethod
     def _dockerfile_valid(cls) -> None:
-        repo = None
-        with open("./Dockerfile") as file:
-            for line in file.readlines():
-                if "FROM runtime AS" in line:
-                    repo = line.split("AS")[1].strip()
-        if repo is None:
+        if load_dockerfile(f"{getcwd()}/Dockerfile").repository_name is None:
             raise SntlException("Dockerfile not formed for sentential")
 
     @classmethod
@@ -51,4 +46,6 @@ class Assurances:
 
     @classmethod
     def _aws_authenticated(cls):
+        from sentential.lib.clients import clients
+
         clients.sts.get_caller_identity()
@@ -0,0 +1,212 @@
+import os
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from time import time
+from contextlib import closing
+from typing import Dict, Tuple
+from sentential.lib.clients import clients
+from sentential.lib.context import Context
+from sentential.lib.exceptions import StoreError
+from sentential.lib.shapes import AwsSSMParam, StoreBackendName
+
+SNTL_STORE_BACKEND = "SNTL_STORE_BACKEND"
+SNTL_STORE_DB = os.getenv(
+    "SNTL_STORE_DB",
+    default=os.path.join(
+        os.getenv("XDG_DATA_HOME", "~/.local/share"), "sentential", "stores.db"
+    ),
+)
+
+# parameter value limits in bytes, by ssm tier
+TIER_LIMITS = {"Standard": 4096, "Advanced": 8192}
+
+# path -> (state, version), version 0 meaning the path holds nothing
+Fetched = Dict[str, Tuple[Dict, int]]
+
+
+class StoreBackend(ABC):
+    """where store parameters live, every store of an ontology shares one backend"""
+
+    name: str
+
+    @abstractmethod
+    def get(self, paths: Dict[str, bool]) -> Fetched:
+        """read many paths at once, path -> whether it needs decrypting"""
+        ...
+
+    @abstractmethod
+    def scan(self, suffix: str, decrypt: bool) -> Fetched:
+        """every /<partition><suffix> path held, suffix being /<repo>/<Model>"""
+        ...
+
+    @abstractmethod
+    def put(self, path: str, value: str, encrypted: bool) -> int:
+        """write value to path, returns the new version"""
+        ...
+
+    @abstractmethod
+    def delete(self, path: str) -> None:
+        ...
+
+
+class SsmBackend(StoreBackend):
+    name = "ssm"
+
+    def __init__(self, context: Context) -> None:
+        self.context = context
+
+    def get(self, paths: Dict[str, bool]) -> Fetched:
+        fetched: Fetched = {path: ({}, 0) for path in paths}
+        if len(paths) == 1:
+            [(path, decrypt)] = paths.items()
+            try:
+                resp = clients.ssm.get_parameter(Name=path, WithDecryption=decrypt)
+                param = AwsSSMParam(**resp["Parameter"])
+                fetched[path] = (json.loads(param.Value), param.Version)
+            except clients.ssm.exceptions.ParameterNotFound:
+                pass
+            return fetched
+
+        # plain and encrypted paths never share a call, only the latter need kms:Decrypt
+        for decrypt in [False, True]:
+            names = [name for name, encrypted in paths.items() if encrypted == decrypt]
+            for i in range(0, len(names), 10):  # GetParameters takes at most ten names
+                resp = clients.ssm.get_parameters(
+                    Names=names[i : i + 10], WithDecryption=decrypt
+                )
+                for parameter in resp["Parameters"]:
+                    param = AwsSSMParam(**parameter)
+                    fetched[param.Name] = (json.loads(param.Value), param.Version)
+        return fetched
+
+    def scan(self, suffix: str, decrypt: bool) -> Fetched:
+        # names come from metadata, only the matches are read and decrypted
+        names = []
+        paginator = clients.ssm.get_paginator("describe_parameters")
+        for page in paginator.paginate(
+            ParameterFilters=[{"Key": "Name", "Option": "Contains", "Values": [suffix]}]
+        ):
+            for parameter in page["Parameters"]:
+                if _partitioned(parameter["Name"], suffix):
+                    names.append(parameter["Name"])
+        if not names:
+            return {}
+        fetched = self.get({name: decrypt for name in names})
+        # a name deleted since it was described reads back as version 0
+        return {name: held for name, held in fetched.items() if held[1]}
+
+    def put(self, path: str, value: str, encrypted: bool) -> int:
+        params = {}
+        params["Name"] = path
+        params["Value"] = value
+        params["Overwrite"] = True
+        params["Tier"] = _tier(path, value)
+        params["Type"] = "SecureString" if encrypted else "String"
+        if params["Type"] == "SecureString":
+            params["KeyId"] = self.context.kms_key_id
+        try:
+            return clients.ssm.put_parameter(**params)["Version"]
+        except clients.ssm.exceptions.ClientError as e:
+            # ssm refuses to move an advanced parameter back to standard, keep it advanced
+            if params["Tier"] != "Standard" or "advanced" not in str(e).lower():
+                raise
+            params["Tier"] = "Advanced"
+            return clients.ssm.put_parameter(**params)["Version"]
+
+    def delete(self, path: str) -> None:
+        try:
+            clients.ssm.delete_parameter(Name=path)
+        except clients.ssm.exceptions.ParameterNotFound:
+            pass
+
+
+class LocalBackend(StoreBackend):
+    """sqlite file on this machine, for offline work and `deploy local` iterations.
+    secrets are stored unencrypted, the file is only readable by its owner."""
+
+    name = "local"
+
+    def __init__(self, db: str = "") -> None:
+        self.db = os.path.expanduser(db or SNTL_STORE_DB)
+
+    def _connect(self) -> sqlite3.Connection:
+        if not os.path.exists(self.db):
+            os.makedirs(os.path.dirname(self.db), mode=0o700, exist_ok=True)
+            os.close(os.open(self.db, os.O_CREAT | os.O_WRONLY, 0o600))
+        connection = sqlite3.connect(self.db, timeout=10)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS parameters "
+            "(name TEXT PRIMARY KEY, value TEXT NOT NULL, version INTEGER NOT NULL, modified REAL NOT NULL)"
+        )
+        return connection
+
+    def get(self, paths: Dict[str, bool]) -> Fetched:
+        fetched: Fetched = {path: ({}, 0) for path in paths}
+        placeholders = ",".join("?" for _ in paths)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                f"SELECT name, value, version FROM parameters WHERE name IN ({placeholders})",
+                list(paths.keys()),
+            ).fetchall()
+        for name, value, version in rows:
+            fetched[name] = (json.loads(value), version)
+        return fetched
+
+    def scan(self, suffix: str, decrypt: bool) -> Fetched:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT name, value, version FROM parameters WHERE substr(name, -?) = ?",
+                (len(suffix), suffix),
+            ).fetchall()
+        return {
+            name: (json.loads(value), version)
+            for name, value, version in rows
+            if _partitioned(name, suffix)
+        }
+
+    def put(self, path: str, value: str, encrypted: bool) -> int:
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO parameters (name, value, version, modified) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value, "
+                "version = version + 1, modified = excluded.modified",
+                (path, value, time()),
+            )
+            (version,) = connection.execute(
+                "SELECT version FROM parameters WHERE name = ?", (path,)
+            ).fetchone()
+        return version
+
+    def delete(self, path: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM parameters WHERE name = ?", (path,))
+
+
+def store_backend(context: Context, name: str = "") -> StoreBackend:
+    """backend by name, defaults to $SNTL_STORE_BACKEND and then ssm"""
+    name = name or os.getenv(SNTL_STORE_BACKEND, default="ssm")
+    if name == StoreBackendName.ssm:
+        return SsmBackend(context)
+    if name == StoreBackendName.local:
+        return LocalBackend()
+    raise StoreError(
+        f"unknown store backend {name}, expected one of {[b.value for b in StoreBackendName]}"
+    )
+
+
+def _tier(path: str, value: str) -> str:
+    # the whole store stays one parameter, it is what the entry wrapper reads from SSM_PATHS
+    size = len(value.encode("utf-8"))
+    for tier, limit in TIER_LIMITS.items():
+        if size <= limit:
+            return tier
+    raise StoreError(
+        f"{path} is {size} bytes, over the {TIER_LIMITS['Advanced']} byte ssm limit"
+    )
+
+
+def _partitioned(name: str, suffix: str) -> bool:
+    # /<partition>/<repo>/<Model>, partitions never contain a slash
+    prefix = name[: -len(suffix)]
+    return name.endswith(suffix) and len(prefix) > 1 and prefix.count("/") == 1
@@ -0,0 +1,74 @@
+import os
+import json
+import hashlib
+from time import time
+from pathlib import PosixPath
+from typing import Any, Optional
+
+SNTL_CACHE_DIR = os.getenv(
+    "SNTL_CACHE_DIR",
+    default=os.path.join(os.getenv("XDG_CACHE_HOME", "~/.cache"), "sentential"),
+)
+
+
+def cache_disabled() -> bool:
+    """`sntl --no-cache` (or SNTL_NO_CACHE) skips cached reads, fresh values are still written"""
+    return os.getenv("SNTL_NO_CACHE", "false").lower() in ["1", "true", "yes"]
+
+
+class DiskCache:
+    """small json file cache, one file per key under a namespace directory"""
+
+    def __init__(
+        self, namespace: str, ttl: Optional[int] = None, root: Optional[str] = None
+    ) -> None:
+        self.ttl = ttl
+        self.dir = PosixPath(root or SNTL_CACHE_DIR).expanduser().joinpath(namespace)
+
+    def _path(self, key: str) -> PosixPath:
+        return self.dir.joinpath(hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def get(self, key: str) -> Optional[Any]:
+        if cache_disabled():
+            return None
+
+        try:
+            with open(self._path(key)) as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if self.ttl is not None and time() - entry["written"] > self.ttl:
+            return None
+
+        return entry["value"]
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            os.makedirs(self.dir, mode=0o700, exist_ok=True)
+            with open(tmp, "w") as file:
+                json.dump({"written": time(), "value": value}, file)
+            os.replace(tmp, path)
+        except OSError:
+            # a cache that cannot be written is just a cache miss next time
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def prune(self) -> None:
+        """remove entries written more than ttl seconds ago"""
+        if self.ttl is None or not self.dir.exists():
+            return
+        cutoff = time() - self.ttl
+        for entry in self.dir.iterdir():
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    entry.unlink()
+            except OSError:
+                pass
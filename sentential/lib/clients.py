@@ -1,28 +1,60 @@
 import boto3
 from os import getenv
-from python_on_whales import docker
-from sentential.lib.exceptions import AWS_EXCEPTIONS
+from threading import RLock
+from functools import cached_property
+from typing import Any, Dict
 
 boto3_config = {"none": {}, "test": {"endpoint_url": "http://localhost:5000"}}
 
+# attribute name -> boto3 service name
+SERVICES: Dict[str, str] = {
+    "lmb": "lambda",
+    "iam": "iam",
+    "sts": "sts",
+    "ecr": "ecr",
+    "ssm": "ssm",
+    "kms": "kms",
+    "ebr": "events",
+    "api_gw": "apigatewayv2",
+    "logs": "logs",
+}
+
 
 class Clients:
+    """lazy client registry, each client is built from one shared session on first access"""
+
     def __init__(self, env: str = getenv("SENTENTIAL_ENV", "none")) -> None:
+        self.env = env
         self.boto3 = boto3
-        self.lmb = boto3.client("lambda", **boto3_config[env])
-        self.iam = boto3.client("iam", **boto3_config[env])
-        self.sts = boto3.client("sts", **boto3_config[env])
-        self.ecr = boto3.client("ecr", **boto3_config[env])
-        self.ssm = boto3.client("ssm", **boto3_config[env])
-        self.kms = boto3.client("kms", **boto3_config[env])
-        self.ebr = boto3.client("events", **boto3_config[env])
-        self.api_gw = boto3.client("apigatewayv2", **boto3_config[env])
-        self.logs = boto3.client("logs", **boto3_config[env])
-        self.docker = docker
-
-
-try:
-    clients = Clients()
-except AWS_EXCEPTIONS as e:
-    print(f"AWS: {e}")
-    exit(1)
+        self._lock = RLock()
+
+    @cached_property
+    def session(self) -> boto3.Session:
+        return boto3.Session()
+
+    @cached_property
+    def docker(self) -> Any:
+        from python_on_whales import docker
+
+        return docker
+
+    def client(self, service: str, **kwargs) -> Any:
+        with self._lock:
+            session = self.session
+        return session.client(service, **{**boto3_config[self.env], **kwargs})
+
+    def __getattr__(self, name: str) -> Any:
+        # only invoked when normal attribute lookup fails, i.e. client not yet built
+        if name not in SERVICES:
+            raise AttributeError(f"{type(self).__name__} has no attribute {name}")
+
+        with self._lock:
+            if name not in self.__dict__:
+                self.__dict__[name] = self.client(SERVICES[name])
+        return self.__dict__[name]
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(SERVICES.keys()))
+
+
+clients = Clients()
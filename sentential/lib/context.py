@@ -1,26 +1,33 @@
+import hashlib
 from typing import Dict, List
-import boto3
 from os import getenv, environ
+from functools import cached_property
+from botocore.exceptions import ClientError
 from sentential.lib.exceptions import ContextError
 from sentential.lib.clients import clients
-from sentential.lib.shapes import derive_paths, Paths, AWSCallerIdentity
+from sentential.lib.cache import DiskCache
+from sentential.lib.dockerfile import load_dockerfile
+from sentential.lib.shapes import derive_paths, Dockerfile, Paths, AWSCallerIdentity
+
+SNTL_CONTEXT_CACHE_TTL = int(getenv("SNTL_CONTEXT_CACHE_TTL", default=(3600)))
 
 
 class Context:
+    """resolves remote facts (identity, kms key) at most once per instance, share it via Ontology"""
+
     def dict(self) -> Dict:
         all = {}
         for method in dir(self):
-            if "__" not in method:
+            if not method.startswith("_"):
                 all[method] = getattr(self, method)
         return all
 
     @property
     def repository_name(self) -> str:
-        with open("./Dockerfile") as file:
-            for line in file.readlines():
-                if "FROM runtime AS" in line:
-                    return line.split("AS")[1].strip()
-        raise ContextError("No runtime stage found in Dockerfile")
+        repository_name = self._dockerfile.repository_name
+        if repository_name is None:
+            raise ContextError("No runtime stage found in Dockerfile")
+        return repository_name
 
     @property
     def resource_name(self) -> str:
@@ -34,10 +41,16 @@ class Context:
     def kms_key_alias(self) -> str:
         return getenv("AWS_KMS_KEY_ALIAS", default="aws/ssm")
 
-    @property  # TODO: make this a cached property
+    @cached_property
     def caller_identity(self) -> AWSCallerIdentity:
-        response = clients.sts.get_caller_identity()
-        return AWSCallerIdentity(**response)
+        key = f"{self._fingerprint}:identity"
+        cached = self._cache.get(key)
+        if cached:
+            return AWSCallerIdentity(**cached)
+
+        identity = AWSCallerIdentity(**clients.sts.get_caller_identity())
+        self._cache.put(key, identity.dict(include={"UserId", "Account", "Arn"}))
+        return identity
 
     @property
     def partition(self) -> str:
@@ -53,7 +66,7 @@ class Context:
 
     @property
     def region(self) -> str:
-        return str(boto3.Session().region_name)
+        return str(clients.session.region_name)
 
     @property
     def path(self) -> Paths:
@@ -65,18 +78,61 @@ class Context:
 
     @property
     def kms_key_id(self) -> str:
+        alias = self.kms_key_alias
+        if alias not in self._kms_key_ids:
+            self._kms_key_ids[alias] = self._kms_key_id(alias)
+        return self._kms_key_ids[alias]
+
+    @cached_property
+    def _kms_key_ids(self) -> Dict[str, str]:
+        # per instance and per alias, AWS_KMS_KEY_ALIAS may change between reads
+        return {}
+
+    def _kms_key_id(self, alias: str) -> str:
+        key = f"{self._fingerprint}:kms:{alias}"
+        cached = self._cache.get(key)
+        if cached:
+            return cached
+
+        alias_name = alias if alias.startswith("alias/") else f"alias/{alias}"
         try:
-            return [
-                ssm_key["TargetKeyId"]
-                for ssm_key in clients.kms.list_aliases()["Aliases"]
-                if self.kms_key_alias in ssm_key["AliasName"]
-            ][0]
-        except IndexError:
+            key_id = clients.kms.describe_key(KeyId=alias_name)["KeyMetadata"]["KeyId"]
+        except clients.kms.exceptions.NotFoundException:
             raise ContextError("Key specified by AWS_KMS_KEY_ALIAS does not exist")
-        except KeyError:
-            raise ContextError(
-                "If region has not yet written an ssm parameter with the default key, the default kms key will not yet exist \\o/."
-            )
+        except ClientError:
+            # e.g. no kms:DescribeKey on the key, listing aliases may still be permitted
+            key_id = self._scan_kms_aliases(alias_name)
+
+        self._cache.put(key, key_id)
+        return key_id
+
+    def _scan_kms_aliases(self, alias_name: str) -> str:
+        for page in clients.kms.get_paginator("list_aliases").paginate():
+            for alias in page["Aliases"]:
+                if alias["AliasName"] != alias_name:
+                    continue
+                if "TargetKeyId" not in alias:
+                    raise ContextError(
+                        "If region has not yet written an ssm parameter with the default key, the default kms key will not yet exist \\o/."
+                    )
+                return alias["TargetKeyId"]
+        raise ContextError("Key specified by AWS_KMS_KEY_ALIAS does not exist")
+
+    @property
+    def _dockerfile(self) -> Dockerfile:
+        return load_dockerfile(self.path.dockerfile)
+
+    @cached_property
+    def _cache(self) -> DiskCache:
+        return DiskCache("context", ttl=SNTL_CONTEXT_CACHE_TTL)
+
+    @cached_property
+    def _fingerprint(self) -> str:
+        # identifies the credential source without persisting anything secret
+        credentials = clients.session.get_credentials()
+        access_key = credentials.access_key if credentials else None
+        source = [clients.env, clients.session.profile_name, access_key, self.region]
+        return hashlib.sha256("|".join(map(str, source)).encode("utf-8")).hexdigest()
 
     @property
     def repository_url(self) -> str:
@@ -0,0 +1,77 @@
+import os
+import shlex
+from functools import lru_cache
+from pathlib import PosixPath
+from typing import List, Optional, Union
+from sentential.lib.shapes import Dockerfile, DockerfileStage
+
+
+def load_dockerfile(path: Union[str, PosixPath] = "./Dockerfile") -> Dockerfile:
+    """parse a Dockerfile, re-reading it only when its mtime or size changes"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)  # raises FileNotFoundError like open() would
+    return _parse(path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _parse(path: str, mtime_ns: int, size: int) -> Dockerfile:
+    stages: List[DockerfileStage] = []
+    copied_from: List[str] = []
+
+    with open(path) as file:
+        for number, line in _instructions(file.readlines()):
+            try:
+                instruction, *args = shlex.split(line, comments=True)
+            except ValueError:
+                continue
+
+            flags = [arg for arg in args if arg.startswith("--")]
+            args = [arg for arg in args if not arg.startswith("--")]
+
+            if instruction.upper() == "FROM" and args:
+                stages.append(
+                    DockerfileStage(
+                        base=args[0],
+                        name=_stage_name(args),
+                        platform=_flag(flags, "--platform"),
+                        line=number,
+                    )
+                )
+
+            if instruction.upper() == "COPY":
+                source = _flag(flags, "--from")
+                if source:
+                    copied_from.append(source)
+
+    return Dockerfile(path=PosixPath(path), stages=stages, copied_from=copied_from)
+
+
+def _instructions(lines: List[str]):
+    """yield (line number, instruction) with backslash continuations joined"""
+    buffer, start = "", 0
+    for number, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if not buffer:
+            start = number
+            if not stripped or stripped.startswith("#"):
+                continue
+        if stripped.endswith("\\"):
+            buffer += stripped[:-1] + " "
+            continue
+        yield start, buffer + stripped
+        buffer = ""
+    if buffer:
+        yield start, buffer
+
+
+def _stage_name(args: List[str]) -> Optional[str]:
+    if len(args) >= 3 and args[1].upper() == "AS":
+        return args[2]
+    return None
+
+
+def _flag(flags: List[str], name: str) -> Optional[str]:
+    for flag in flags:
+        if flag.startswith(f"{name}="):
+            return flag.split("=", 1)[1]
+    return None
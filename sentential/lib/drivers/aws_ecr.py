@@ -1,25 +1,33 @@
 import re
 import os
-from typing import List, Union
-from functools import lru_cache
-import semantic_version as semver
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Union
+from bisect import bisect_left
+from functools import cached_property, lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from semantic_version import Version, validate
 import requests
-from distutils.version import LooseVersion
 from sentential.lib.drivers.spec import ImagesDriver
+from sentential.lib.cache import DiskCache
 from sentential.lib.clients import clients
 from sentential.lib.ontology import Ontology
 from sentential.lib.exceptions import AwsDriverError
 from sentential.lib.shapes import (
+    Architecture,
+    MANIFEST_LIST_MEDIA_TYPES,
     AwsEcrAuthorizationData,
     AwsEcrAuthorizationToken,
+    AwsImageDescription,
     AwsImageDescriptions,
     AwsImageDetail,
-    AwsImageDetails,
     AwsImageManifest,
     AwsManifestList,
     AwsManifestListManifestPlatform,
 )
 
+SNTL_MANIFEST_CACHE_TTL = int(os.getenv("SNTL_MANIFEST_CACHE_TTL", default=(2592000)))
+
 
 class ECRApi:
     """currently unused, but will be needed soon enough"""
@@ -48,44 +56,93 @@ class ECRApi:
 
 
 class SemVer:
-    """encapsulates semver behavior, only used via AwsEcrDriver"""
+    """semver index over tags, parsed and sorted once, only used via AwsEcrDriver"""
 
-    def __init__(self, images: List[AwsImageDetail]) -> None:
-        self.images = images
-        self.regex = r"^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$"
+    def __init__(self, tags: List[str]) -> None:
+        self.tags = tags
 
-    @property
-    def versions(self) -> List[str]:
-        images = self.images
-        versions = []
-        for image in images:
-            if image.imageId.imageTag:
-                versions.append(image.imageId.imageTag)
-        return list(set(versions))
+    @cached_property
+    def index(self) -> List[Version]:
+        tags = set(tag for tag in self.tags if tag and validate(tag))
+        return sorted(Version(tag) for tag in tags)
+
+    @cached_property
+    def positions(self) -> Dict[str, int]:
+        return {str(version): i for i, version in enumerate(self.index)}
+
+    @cached_property
+    def channels(self) -> Dict[str, List[Version]]:
+        """sorted versions by prerelease channel, releases under the empty channel"""
+        channels: Dict[str, List[Version]] = {"": []}
+        for version in self.index:
+            channel = str(version.prerelease[0]) if version.prerelease else ""
+            channels.setdefault(channel, []).append(version)
+        return channels
 
     @property
     def semver(self) -> List[str]:
-        matcher = re.compile(self.regex)
-        versions = self.versions
-        versions = [version for version in versions if matcher.match(version)]
-        versions = sorted(versions, key=lambda v: LooseVersion(v))
-        return versions
+        return [str(version) for version in self.index]
 
     @property
     def latest(self) -> str:
-        if self.semver:
-            return self.semver[-1]
+        # newest release, or the newest prerelease while nothing has been released
+        if not self.channels[""] and self.index:
+            return str(self.index[-1])
+        return self.latest_in()
+
+    def latest_in(self, channel: str = "") -> str:
+        versions = self.channels.get(channel, [])
+        if versions:
+            return str(versions[-1])
         else:
             return "0.0.0"
 
-    def next(self, major=False, minor=False) -> str:
-        latest = semver.Version(self.latest)
+    def position(self, tag: str) -> int:
+        """sort position of tag, -1 if it is not semver"""
+        return self.positions.get(tag, -1)
+
+    def range(self, spec: str, channel: str = "") -> List[str]:
+        """versions matching spec, e.g. 1.x or 1.4.x"""
+        parts = spec.split(".")
+        if not 1 < len(parts) <= 3 or parts[-1] not in ["x", "*"]:
+            raise AwsDriverError(f"{spec} is not a version range, like 1.x or 1.4.x")
+        try:
+            prefix = [int(part) for part in parts[:-1]]
+        except ValueError:
+            raise AwsDriverError(f"{spec} is not a version range, like 1.x or 1.4.x")
+
+        lower = _floor(*(prefix + [0, 0])[:3])
+        upper = _floor(*(prefix[:-1] + [prefix[-1] + 1, 0, 0])[:3])
+        return self._between(channel, lower, upper)
+
+    def next(self, major=False, minor=False, channel: str = "") -> str:
+        latest = Version(self.latest)
         if major:
-            return str(latest.next_major())
-        if minor:
-            return str(latest.next_minor())
+            release = latest.next_major()
+        elif minor:
+            release = latest.next_minor()
         else:
-            return str(latest.next_patch())
+            release = latest.next_patch()
+        if not channel:
+            return str(release)
+
+        # continue the channel's numbering for this release, e.g. 1.5.0-rc.2 -> 1.5.0-rc.3
+        floor = _floor(release.major, release.minor, release.patch)
+        for version in reversed(self._between(channel, floor, release)):
+            prerelease = Version(version).prerelease
+            if len(prerelease) == 2 and prerelease[1].isdigit():
+                return f"{release}-{channel}.{int(prerelease[1]) + 1}"
+        return f"{release}-{channel}.1"
+
+    def _between(self, channel: str, lower: Version, upper: Version) -> List[str]:
+        versions = self.channels.get(channel, [])
+        matched = versions[bisect_left(versions, lower) : bisect_left(versions, upper)]
+        return [str(version) for version in matched]
+
+
+def _floor(major: int, minor: int, patch: int) -> Version:
+    # x.y.z-0 precedes every other version of x.y.z, releases and prereleases alike
+    return Version(major=major, minor=minor, patch=patch, prerelease=("0",))
 
 
 class AwsEcrDriver(ImagesDriver):
@@ -98,7 +155,7 @@ class AwsEcrDriver(ImagesDriver):
         manifest_lists = self._manifest_lists()
 
         if tag is None:
-            tag = SemVer(manifest_lists).latest
+            tag = SemVer([m.imageId.imageTag for m in manifest_lists]).latest
 
         for manifest in manifest_lists:
             if manifest.imageId.imageTag == tag:
@@ -106,22 +163,137 @@ class AwsEcrDriver(ImagesDriver):
 
         raise AwsDriverError("no image found for {tag} tag")
 
-    def next(self, major: bool = False, minor: bool = False) -> str:
-        return SemVer(self._manifest_lists()).next(major, minor)
+    def next(self, major: bool = False, minor: bool = False, channel: str = "") -> str:
+        return SemVer(self._tags()).next(major, minor, channel)
 
-    def clean(self) -> None:
-        image_details = self._manifests()
-        if len(image_details) == 0:
-            return
-        manifest_digests = [
-            {"imageDigest": detail.imageId.imageDigest} for detail in image_details
+    def clean(
+        self,
+        keep_last: int = 0,
+        older_than: int = 0,
+        deployed: Optional[str] = None,
+        workers: int = 8,
+    ) -> List[AwsImageDescription]:
+        """delete images, sparing builds kept by retention and the per arch images they reference"""
+        descriptions = self._descriptions()
+        is_list = lambda d: d.imageManifestMediaType in MANIFEST_LIST_MEDIA_TYPES
+        kept = set()
+        builds = list(dict.fromkeys(d.imageDigest for d, _ in self._tagged()))
+        kept.update(builds[:keep_last])
+        if deployed is not None:
+            kept.add(_sha256(deployed))
+            kept.update(d.imageDigest for d, _ in self._tagged(deployed=deployed))
+        if older_than:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=older_than)
+            kept.update(
+                d.imageDigest
+                for d in descriptions
+                if d.imagePushedAt is None or d.imagePushedAt >= cutoff
+            )
+        kept_lists = [
+            d.imageDigest for d in descriptions if d.imageDigest in kept and is_list(d)
         ]
-        clients.ecr.batch_delete_image(
-            repositoryName=self.ontology.context.repository_name,
-            imageIds=manifest_digests,
-        )
+        for body in self._manifest_bodies(kept_lists).values():
+            kept.update(m["digest"] for m in json.loads(body).get("manifests", []))
+
+        doomed = [d for d in descriptions if d.imageDigest not in kept]
+        # ecr refuses to delete an image a manifest list still references, lists go first
+        lists = [d for d in doomed if is_list(d)]
+        images = [d for d in doomed if not is_list(d)]
+        failures = []
+        for batch in [lists, images]:
+            failures.extend(self._delete([d.imageDigest for d in batch], workers))
+
+        for description in doomed:
+            self._manifest_cache.delete(self._manifest_key(description.imageDigest))
+        self._manifest_cache.prune()
         self._clean_manifests()
         self._manifests.cache_clear()
+        self._descriptions.cache_clear()
+        self._tags.cache_clear()
+        if failures:
+            raise AwsDriverError(
+                f"{len(failures)} images not deleted, first failure: {failures[0]}"
+            )
+        return doomed
+
+    def manifest_lists(
+        self, limit: int = 0, since: str = "", deployed: Optional[str] = None
+    ) -> List[AwsImageDetail]:
+        """tagged manifest lists newest first, pruned on metadata before any manifest is fetched"""
+        tagged = self._tagged(since, deployed)
+        return self._details(tagged[:limit] if limit else tagged)
+
+    def _tagged(
+        self, since: str = "", deployed: Optional[str] = None
+    ) -> List[Tuple[AwsImageDescription, str]]:
+        # since is a version or an iso date, deployed the digest the lambda runs
+        tagged = [
+            (description, tag)
+            for description in self._descriptions()
+            if description.imageManifestMediaType in MANIFEST_LIST_MEDIA_TYPES
+            for tag in description.imageTags or []
+        ]
+        if deployed is not None:
+            deployed = _sha256(deployed)
+            builds = self._builds(deployed)
+            tagged = [
+                (d, tag)
+                for d, tag in tagged
+                if d.imageDigest == deployed or tag in builds
+            ]
+        if since and validate(since):
+            tagged = [
+                (d, tag)
+                for d, tag in tagged
+                if validate(tag) and Version(tag) >= Version(since)
+            ]
+        elif since:
+            pushed = _pushed_since(since)
+            tagged = [
+                (d, tag)
+                for d, tag in tagged
+                if d.imagePushedAt is not None and d.imagePushedAt >= pushed
+            ]
+
+        versions = SemVer([tag for _, tag in tagged])
+        newest = lambda t: (
+            versions.position(t[1]),
+            t[0].imagePushedAt.timestamp() if t[0].imagePushedAt else 0,
+        )
+        return sorted(tagged, key=newest, reverse=True)
+
+    def _delete(self, digests: List[str], workers: int) -> List[str]:
+        """batch_delete_image in parallel chunks of 100, returns the failures"""
+
+        def delete(chunk: List[str]) -> List[str]:
+            response = clients.ecr.batch_delete_image(
+                repositoryName=self.repo_name,
+                imageIds=[{"imageDigest": digest} for digest in chunk],
+            )
+            # an image already gone, e.g. deleted by a racing clean, counts as deleted
+            return [
+                f"{f['imageId'].get('imageDigest')} {f['failureReason']}"
+                for f in response["failures"]
+                if f.get("failureCode") != "ImageNotFound"
+            ]
+
+        chunks = [digests[i : i + 100] for i in range(0, len(digests), 100)]
+        failures = []
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+            for failed in pool.map(delete, chunks):
+                failures.extend(failed)
+        return failures
+
+    def _builds(self, digest: str) -> List[str]:
+        # per arch images are tagged <build>-<arch> by publish
+        builds = []
+        for description in self._descriptions():
+            if description.imageDigest == digest:
+                for tag in description.imageTags or []:
+                    build, _, arch = tag.rpartition("-")
+                    if arch in [a.value for a in Architecture]:
+                        builds.append(build)
+        return builds
 
     def _manifest_lists(self) -> List[AwsImageDetail]:
         manifest_lists = []
@@ -132,16 +304,87 @@ class AwsEcrDriver(ImagesDriver):
 
     @lru_cache
     def _manifests(self) -> List[AwsImageDetail]:
-        response = clients.ecr.describe_images(repositoryName=self.repo_name)
-        image_desc = AwsImageDescriptions(**response).imageDetails
-        if len(image_desc) == 0:
-            return []
-        filter = [{"imageDigest": image.imageDigest} for image in image_desc]
-        response = clients.ecr.batch_get_image(
-            repositoryName=self.repo_name, imageIds=filter
+        # one detail per tag, tags move between digests but a digest's manifest never changes
+        return self._details(
+            [(d, tag) for d in self._descriptions() for tag in d.imageTags or [None]]
         )
-        image_details = AwsImageDetails(**response)
-        return image_details.images
+
+    def _details(
+        self, tagged: List[Tuple[AwsImageDescription, Optional[str]]]
+    ) -> List[AwsImageDetail]:
+        bodies = self._manifest_bodies([d.imageDigest for d, _ in tagged])
+        details = []
+        for description, tag in tagged:
+            if description.imageDigest not in bodies:
+                continue  # deleted between describe and fetch
+            details.append(
+                AwsImageDetail(
+                    registryId=description.registryId or "",
+                    repositoryName=self.repo_name,
+                    imageId={"imageDigest": description.imageDigest, "imageTag": tag},
+                    imageManifest=bodies[description.imageDigest],
+                )
+            )
+        return details
+
+    @lru_cache
+    def _descriptions(self) -> List[AwsImageDescription]:
+        descriptions = []
+        paginator = clients.ecr.get_paginator("describe_images")
+        for page in paginator.paginate(repositoryName=self.repo_name):
+            descriptions.extend(AwsImageDescriptions(**page).imageDetails)
+        return descriptions
+
+    @lru_cache
+    def _tags(self) -> List[str]:
+        """manifest list tags, from image metadata alone without fetching any manifest"""
+        tags = []
+        paginator = clients.ecr.get_paginator("describe_images")
+        for page in paginator.paginate(
+            repositoryName=self.repo_name, filter={"tagStatus": "TAGGED"}
+        ):
+            for description in AwsImageDescriptions(**page).imageDetails:
+                if description.imageManifestMediaType in MANIFEST_LIST_MEDIA_TYPES:
+                    tags.extend(description.imageTags or [])
+        return tags
+
+    @cached_property
+    def _manifest_cache(self) -> DiskCache:
+        # bodies never change, the ttl only bounds how long entries for vanished images linger
+        return DiskCache("manifests", ttl=SNTL_MANIFEST_CACHE_TTL)
+
+    def _manifest_key(self, digest: str) -> str:
+        return f"{self.ontology.context.repository_url}@{digest}"
+
+    def _manifest_bodies(self, digests: List[str]) -> Dict[str, str]:
+        """manifest json by digest, only digests never seen before are fetched"""
+        cache, key = self._manifest_cache, self._manifest_key
+        bodies = {}
+        for digest in digests:
+            body = cache.get(key(digest))
+            if body is not None:
+                bodies[digest] = body
+        unseen = [digest for digest in dict.fromkeys(digests) if digest not in bodies]
+
+        def fetch(chunk: List[str]) -> List[AwsImageDetail]:
+            response = clients.ecr.batch_get_image(
+                repositoryName=self.repo_name,
+                imageIds=[{"imageDigest": digest} for digest in chunk],
+            )
+            return [
+                image
+                for image in response["images"]
+                if image["imageId"]["imageDigest"] in chunk
+            ]
+
+        chunks = [unseen[i : i + 100] for i in range(0, len(unseen), 100)]
+        with ThreadPoolExecutor(max_workers=max(1, min(4, len(chunks)))) as pool:
+            for images in pool.map(fetch, chunks):
+                for image in images:
+                    digest = image["imageId"]["imageDigest"]
+                    bodies[digest] = image["imageManifest"]
+                    cache.put(key(digest), image["imageManifest"])
+        return bodies
 
     def _clean_manifests(self) -> None:
         dir = os.path.expanduser("~/.docker/manifests/")
@@ -151,3 +394,18 @@ class AwsEcrDriver(ImagesDriver):
                     for file in os.listdir(os.path.join(dir, manifest)):
                         os.remove(os.path.join(dir, manifest, file))
                     os.rmdir(os.path.join(dir, manifest))
+
+
+def _sha256(digest: str) -> str:
+    # lambda reports image digests without the algorithm prefix
+    return digest if digest.startswith("sha256:") else f"sha256:{digest}"
+
+
+def _pushed_since(since: str) -> datetime:
+    try:
+        pushed = datetime.fromisoformat(since)
+    except ValueError:
+        raise AwsDriverError(f"{since} is neither a version nor an iso date")
+    if pushed.tzinfo is None:
+        pushed = pushed.replace(tzinfo=timezone.utc)
+    return pushed
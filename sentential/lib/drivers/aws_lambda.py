@@ -7,11 +7,13 @@ from sentential.lib.exceptions import AwsDriverError
 from sentential.lib.shapes import (
     LAMBDA_ROLE_POLICY_JSON,
     Architecture,
+    AwsFunction,
     AwsImageDetail,
     AwsManifestList,
     LambdaInvokeResponse,
     Configs,
     AwsManifestListDistribution,
+    StoreBackendName,
 )
 from sentential.lib.clients import clients
 from sentential.lib.template import Policy
@@ -29,10 +31,21 @@ class AwsLambdaDriver(LambdaDriver):
         # there must be a better way to do polymorphic type stuff...
         return cast(Configs, self.ontology.configs.parameters)
 
-    def deploy(self, image: AwsImageDetail, arch: Union[Architecture, None]) -> str:
+    def deploy(
+        self,
+        image: AwsImageDetail,
+        arch: Union[Architecture, None],
+        bake_envs: bool = False,
+    ) -> str:
+        # the function reads its stores from ssm at cold start, local stores never reach it
+        if self.ontology.backend.name == StoreBackendName.local:
+            raise AwsDriverError(
+                "deploy aws reads stores from ssm, not the local store backend. "
+                "push them with `sntl envs push --all`, then deploy with --store-backend ssm"
+            )
         chosen_dist = self._choose_dist(image, arch)
 
-        self.ontology.export_store_defaults()
+        skipped = self.ontology.export_store_defaults()
 
         tags = self.ontology.tags.parameters.dict()
 
@@ -40,10 +53,10 @@ class AwsLambdaDriver(LambdaDriver):
             RoleName=self._put_role(tags)["Role"]["RoleName"],
             PolicyArn=self._put_policy(tags)["Policy"]["Arn"],
         )
-        self._put_lambda(chosen_dist, tags)
+        self._put_lambda(chosen_dist, tags, bake_envs)
         self._put_log_policy()
 
-        return f"deployed {self.ontology.context.resource_name} to aws"
+        return f"deployed {self.ontology.context.resource_name} to aws ({skipped} unchanged store writes skipped)"
 
     def _choose_dist(
         self, image: AwsImageDetail, arch: Union[Architecture, None]
@@ -126,6 +139,13 @@ class AwsLambdaDriver(LambdaDriver):
     def clean(self) -> None:
         self._clean_logs()
 
+    def deployed_digest(self) -> Optional[str]:
+        try:
+            resp = clients.lmb.get_function(FunctionName=self.function_name)
+        except clients.lmb.exceptions.ResourceNotFoundException:
+            return None
+        return AwsFunction(**resp).Configuration.CodeSha256
+
     def _put_role(self, tags: Optional[Dict[str, str]] = None) -> Dict:
         role_name = self.function_name
         try:
@@ -191,7 +211,10 @@ class AwsLambdaDriver(LambdaDriver):
         return policy
 
     def _put_lambda(
-        self, image: AwsManifestListDistribution, tags: Optional[Dict[str, str]] = None
+        self,
+        image: AwsManifestListDistribution,
+        tags: Optional[Dict[str, str]] = None,
+        bake_envs: bool = False,
     ) -> Dict:
         role_name = self.function_name
         function_name = self.function_name
@@ -202,9 +225,7 @@ class AwsLambdaDriver(LambdaDriver):
             else image.platform.architecture
         )
         image_uri = f"{self.ontology.context.repository_url}@{image.digest}"
-        export_paths = ",".join(
-            [str(self.ontology.envs.path), str(self.ontology.secrets.path)]
-        )
+        variables = self.ontology.lambda_environment(bake_envs)
 
         sleep(10)
         try:
@@ -214,11 +235,7 @@ class AwsLambdaDriver(LambdaDriver):
                 PackageType="Image",
                 Code={"ImageUri": image_uri},
                 Description=f"sententially deployed {image_uri}",
-                Environment={
-                    "Variables": {
-                        "SSM_PATHS": export_paths,
-                    }
-                },
+                Environment={"Variables": variables},
                 Architectures=[image_arch],
                 EphemeralStorage={"Size": self.provision.storage},
                 MemorySize=self.provision.memory,
@@ -234,11 +251,7 @@ class AwsLambdaDriver(LambdaDriver):
                 FunctionName=function_name,
                 Role=role_arn,
                 Description=f"sententially deployed {image_uri}",
-                Environment={
-                    "Variables": {
-                        "SSM_PATHS": export_paths,
-                    }
-                },
+                Environment={"Variables": variables},
                 EphemeralStorage={"Size": self.provision.storage},
                 MemorySize=self.provision.memory,
                 Timeout=self.provision.timeout,
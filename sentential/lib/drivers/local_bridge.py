@@ -14,6 +14,9 @@ class LocalBridge:
             "lambda_name": "sentential",
             "lambda_internal_port": "8080",
             "lambda_port": "9000",
+            "params_image": "python:3.11-alpine",
+            "params_name": "sentential-params",
+            "params_internal_port": "8082",
         }
     )
 
@@ -3,6 +3,7 @@ from sys import platform
 from typing import Dict, Union
 from sentential.lib.clients import clients
 from sentential.lib.drivers.local_bridge import LocalBridge
+from sentential.lib.drivers.local_parameter_cache import LocalParameterCache
 from sentential.lib.template import Policy
 from sentential.lib.ontology import Ontology
 from sentential.lib.exceptions import LocalDriverError
@@ -15,6 +16,7 @@ from sentential.lib.shapes import (
     AWSCredentials,
     AWSFederationToken,
     LambdaInvokeResponse,
+    StoreBackendName,
 )
 
 
@@ -22,11 +24,17 @@ class LocalLambdaDriver(LambdaDriver):
     def __init__(self, ontology: Ontology) -> None:
         self.ontology = ontology
 
-    def deploy(self, image: Image, inject_env: Dict[str, str] = {}) -> str:
+    def deploy(
+        self,
+        image: Image,
+        inject_env: Dict[str, str] = {},
+        bake_envs: bool = False,
+        cache_parameters: bool = False,
+    ) -> str:
         LocalBridge.setup()  # hoist to cli callback when things are more generalized
         self.destroy()
 
-        self.ontology.export_store_defaults()
+        skipped = self.ontology.export_store_defaults()
 
         credentials = self._get_credentials()
         credentials_env = {
@@ -44,15 +52,17 @@ class LocalLambdaDriver(LambdaDriver):
         if platform == "linux":
             hosts = [("host.docker.internal", "host-gateway")]
 
-        export_paths = ",".join(
-            [str(self.ontology.envs.path), str(self.ontology.secrets.path)]
-        )
-        ssm_paths = ",".join([f""])
-
-        default_env = {
-            "AWS_REGION": self.ontology.context.region,
-            "SSM_PATHS": export_paths,
-        }
+        default_env = {"AWS_REGION": self.ontology.context.region}
+        if self.ontology.backend.name == StoreBackendName.local:
+            # no sdk in the container can read the local backend, so the stores are passed in
+            # directly and nothing depends on the entry wrapper honouring AWS_ENDPOINT_URL_SSM
+            default_env.update(self.ontology.store_environment())
+        else:
+            default_env.update(self.ontology.lambda_environment(bake_envs))
+            if cache_parameters:
+                # the entry wrapper's sdk resolves ssm through this instead of aws
+                parameters = LocalParameterCache(self.ontology)
+                default_env["AWS_ENDPOINT_URL_SSM"] = parameters.start()
 
         clients.docker.run(
             image.id,
@@ -71,7 +81,7 @@ class LocalLambdaDriver(LambdaDriver):
             envs={**default_env, **credentials_env, **inject_env},
         )
 
-        return f"deployed {self.ontology.context.resource_name} to local"
+        return f"deployed {self.ontology.context.resource_name} to local ({skipped} unchanged store writes skipped)"
 
     def destroy(self) -> None:
         clients.docker.remove(
@@ -79,6 +89,7 @@ class LocalLambdaDriver(LambdaDriver):
             force=True,
             volumes=True,
         )
+        LocalParameterCache(self.ontology).stop()
 
     def logs(self, follow: bool = False):
         cmd = ["docker", "logs", LocalBridge.config.lambda_name]
@@ -87,7 +98,7 @@ class LocalLambdaDriver(LambdaDriver):
         os.system(" ".join(cmd))
 
     def invoke(self, payload: str) -> str:
-        local = clients.boto3.client(
+        local = clients.client(
             "lambda", endpoint_url=f"http://localhost:{LocalBridge.config.lambda_port}"
         )
         response = local.invoke(
@@ -100,8 +111,7 @@ class LocalLambdaDriver(LambdaDriver):
     def _get_credentials(self) -> AWSCredentials:
         policy_json = Policy(self.ontology).render()
         identity = self.ontology.context.caller_identity
-        session = clients.boto3.Session()
-        session_creds = session.get_credentials()
+        session_creds = clients.session.get_credentials()
         fallback = AWSCredentials(
             AccessKeyId=session_creds.access_key,
             SecretAccessKey=session_creds.secret_key,
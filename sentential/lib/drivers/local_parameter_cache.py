@@ -0,0 +1,90 @@
+import os
+import json
+from time import time
+from shutil import copyfile
+from pathlib import PosixPath
+from typing import Dict
+from sentential.lib import cache, parameter_server
+from sentential.lib.clients import clients
+from sentential.lib.drivers.local_bridge import LocalBridge
+from sentential.lib.ontology import Ontology
+
+
+class LocalParameterCache:
+    """sidecar on the bridge network serving a one-shot snapshot of the stores with the ssm api
+    shape, so local lambda cold starts never leave the machine.
+
+    the container finds it through AWS_ENDPOINT_URL_SSM, which only sdks supporting service
+    specific endpoints honour: https://docs.aws.amazon.com/sdkref/latest/guide/feature-ss-endpoints.html
+    """
+
+    def __init__(self, ontology: Ontology) -> None:
+        self.ontology = ontology
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://{LocalBridge.config.params_name}:{LocalBridge.config.params_internal_port}"
+
+    @property
+    def dir(self) -> PosixPath:
+        return PosixPath(cache.SNTL_CACHE_DIR).expanduser().joinpath("parameters")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """envs and secrets in one batched read, keyed by parameter name"""
+        stores = [self.ontology.envs, self.ontology.secrets]
+        fetched = self.ontology.backend.get(
+            {str(store.path): store.encrypted for store in stores}
+        )
+        context = self.ontology.context
+        parameters = {}
+        for store in stores:
+            name = str(store.path)
+            state, version = fetched[name]
+            parameters[name] = {
+                "Name": name,
+                "Type": "SecureString" if store.encrypted else "String",
+                "Value": json.dumps(state),
+                "Version": max(version, 1),
+                "LastModifiedDate": time(),
+                "ARN": f"arn:aws:ssm:{context.region}:{context.account_id}:parameter{name}",
+                "DataType": "text",
+            }
+        return parameters
+
+    @property
+    def snapshot_file(self) -> PosixPath:
+        return self.dir.joinpath("parameters.json")
+
+    def start(self) -> str:
+        self.stop()
+        # secrets land in this file decrypted, it is only readable by its owner and removed on stop
+        os.makedirs(self.dir, mode=0o700, exist_ok=True)
+        fd = os.open(self.snapshot_file, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as file:
+            json.dump(self.snapshot(), file)
+        copyfile(parameter_server.__file__, self.dir.joinpath("parameter_server.py"))
+
+        clients.docker.run(
+            LocalBridge.config.params_image,
+            [
+                "python",
+                "/srv/parameter_server.py",
+                "/srv/parameters.json",
+                LocalBridge.config.params_internal_port,
+            ],
+            name=LocalBridge.config.params_name,
+            hostname=LocalBridge.config.params_name,
+            networks=[LocalBridge.config.bridge_name],
+            volumes=[(str(self.dir), "/srv", "ro")],
+            detach=True,
+            remove=False,
+        )
+        return self.endpoint
+
+    def stop(self) -> None:
+        try:
+            clients.docker.remove(
+                [LocalBridge.config.params_name], force=True, volumes=True
+            )
+        finally:
+            self.snapshot_file.unlink(missing_ok=True)
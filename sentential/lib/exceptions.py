@@ -1,5 +1,5 @@
+import sys
 import botocore.exceptions
-from python_on_whales.exceptions import DockerException
 from pydantic import ValidationError
 
 
@@ -14,6 +14,20 @@ def gather_aws_exceptions() -> tuple:
 AWS_EXCEPTIONS = gather_aws_exceptions()
 
 
+def raised_by_docker(e: BaseException) -> bool:
+    # python_on_whales is slow to import, if it was never imported it raised nothing
+    module = sys.modules.get("python_on_whales.exceptions")
+    return module is not None and isinstance(e, module.DockerException)
+
+
+def __getattr__(name: str):
+    if name == "DockerException":
+        from python_on_whales.exceptions import DockerException
+
+        return DockerException
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
+
 class SntlException(BaseException):
     pass
 
@@ -34,6 +48,10 @@ class ContextError(SntlException):
     pass
 
 
+class StoreError(SntlException):
+    pass
+
+
 class JoineryError(SntlException):
     pass
 
@@ -1,6 +1,7 @@
-from distutils.version import LooseVersion
 from functools import lru_cache
-from typing import List, Tuple, Union
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from rich.table import Table, box
 from sentential.lib.clients import clients
 from sentential.lib.drivers.local_bridge import LocalBridge
@@ -11,10 +12,11 @@ from sentential.lib.shapes import (
     ApiGatewayRoute,
     AwsFunction,
     AwsFunctionPublicUrl,
+    AwsImageDetail,
     AwsManifestList,
 )
-from sentential.lib.exceptions import JoineryError, LocalDriverError
-from sentential.lib.drivers.aws_ecr import AwsEcrDriver
+from sentential.lib.exceptions import JoineryError, LocalDriverError, SntlException
+from sentential.lib.drivers.aws_ecr import AwsEcrDriver, SemVer
 from sentential.lib.drivers.local_images import LocalImagesDriver
 from sentential.lib.drivers.aws_lambda import AwsLambdaDriver
 from sentential.lib.drivers.local_lambda import LocalLambdaDriver
@@ -36,16 +38,30 @@ class Row(BaseModel):
 
 
 class Joinery:
-    def __init__(self, ontology: Ontology) -> None:
+    def __init__(
+        self,
+        ontology: Ontology,
+        limit: int = 0,
+        since: str = "",
+        deployed_only: bool = False,
+    ) -> None:
         self.ontology = ontology
+        self.limit = limit
+        self.since = since
+        self.deployed_only = deployed_only
         self.local_images = LocalImagesDriver(self.ontology)
         self.ecr_images = AwsEcrDriver(self.ontology)
         self.aws_lambda = AwsLambdaDriver(self.ontology)
         self.local_lambda = LocalLambdaDriver(self.ontology)
+        self.timings: Dict[str, float] = {}
 
     def list(self, verbose: bool = False) -> Table:
+        self._gather()
         cwi = self._cwi()
         published = self._published()
+        if self.deployed_only:
+            cwi = cwi if cwi and cwi.status else None
+            published = [row for row in published if row.status]
         merged = self._merge(published, cwi)
         drop = ["digest", "dist_digests"]
 
@@ -64,10 +80,86 @@ class Joinery:
 
         return table
 
+    @property
+    def sources(self) -> Dict[str, Callable[[], Any]]:
+        # independent lookups, each memoised so the row builders below reuse the results
+        return {
+            "docker images": self._local_image,
+            "docker ps": self._containers,
+            "docker gateway": self._gateway_running,
+            "ecr manifests": self._manifest_lists,
+            "lambda function": self._deployed_function,
+            "lambda url": self._deployed_url,
+            "event schedule": self._deployed_schedule,
+            "api gateway routes": self._deployed_routes,
+        }
+
+    def _gather(self) -> None:
+        # context is shared by every lookup, resolve it before fanning out
+        self.ontology.context.resource_name
+
+        def timed(name: str, lookup: Callable[[], Any]) -> None:
+            start = perf_counter()
+            try:
+                lookup()
+            except (Exception, SntlException):
+                pass  # failures are not memoised, the caller that needs the result raises it
+            finally:
+                self.timings[name] = perf_counter() - start
+
+        # with --deployed-only the manifests are filtered by the deployed function, so they wait
+        # for its lookup: lru_cache does not stop two threads calling GetFunction at once
+        waits = {"ecr manifests": "lambda function"} if self.deployed_only else {}
+        sources = self.sources
+        with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+            futures = {
+                name: pool.submit(timed, name, lookup)
+                for name, lookup in sources.items()
+                if name not in waits
+            }
+            for name, dependency in waits.items():
+                futures[dependency].result()
+                futures[name] = pool.submit(timed, name, sources[name])
+
+    def timing(self) -> Table:
+        table = Table("source", "seconds", box=box.SIMPLE)
+        for name, seconds in sorted(self.timings.items(), key=lambda t: -t[1]):
+            table.add_row(name, f"{seconds:.3f}")
+        return table
+
+    @lru_cache()
+    def _manifest_lists(self) -> List[AwsImageDetail]:
+        deployed = None
+        if self.deployed_only:
+            function = self._deployed_function()
+            if function is None:
+                return []
+            deployed = function.Configuration.CodeSha256
+        return self.ecr_images.manifest_lists(self.limit, self.since, deployed)
+
+    @lru_cache()
+    def _local_image(self) -> Optional[Image]:
+        try:
+            return self.local_images.get_image(SNTL_WORKING_IMAGE_TAG)
+        except LocalDriverError:
+            return None
+
+    @lru_cache()
+    def _containers(self) -> List[Any]:
+        return clients.docker.ps(True)
+
+    @lru_cache()
+    def _gateway_running(self) -> bool:
+        return clients.docker.container.exists(LocalBridge.config.gw_name)
+
     def _cwi(self) -> Union[Row, None]:
         try:
             row = {}
-            cwi = self.local_images.get_image(SNTL_WORKING_IMAGE_TAG)
+            cwi = self._local_image()
+            if cwi is None:
+                raise LocalDriverError(
+                    f"no image with {SNTL_WORKING_IMAGE_TAG} tag found"
+                )
             row["build"] = "local"
             row["arch"] = cwi.architecture
             row["digest"] = self._humanize_digest(self._extract_digest(cwi))
@@ -76,11 +168,11 @@ class Joinery:
             row["hrefs"] = []
             row["mounts"] = []
 
-            for container in clients.docker.ps(True):
+            for container in self._containers():
                 if cwi.id == container.image:
                     row["status"] = container.state.status.lower()
 
-            if clients.docker.container.exists("sentential-gw"):
+            if self._gateway_running():
                 row["hrefs"].append(
                     self._public_url(f"http://localhost:{LocalBridge.config.gw_port}")
                 )
@@ -95,7 +187,7 @@ class Joinery:
         deployed_url = self._deployed_url()
         deployed_schedule = self._deployed_schedule()
         deployed_routes = self._deployed_routes()
-        for manifest in self.ecr_images._manifest_lists():
+        for manifest in self._manifest_lists():
             if not isinstance(manifest.imageManifest, AwsManifestList):
                 raise JoineryError("expected AwsManifestList object")
 
@@ -129,7 +221,8 @@ class Joinery:
 
             rows.append(Row(**row))  # row yer boat
 
-        return sorted(rows, key=lambda row: LooseVersion(row.build), reverse=True)
+        versions = SemVer([row.build for row in rows])
+        return sorted(rows, key=lambda row: versions.position(row.build), reverse=True)
 
     def _merge(self, published: List[Row], cwi: Union[Row, None]) -> List[Row]:
         if cwi:
@@ -178,7 +271,7 @@ class Joinery:
     @lru_cache()
     def _deployed_schedule(self) -> Union[None, str]:
         try:
-            return AwsEventScheduleMount(Ontology()).mounts()[0]
+            return AwsEventScheduleMount(self.ontology).mounts()[0]
         except:
             return None
 
@@ -186,7 +279,7 @@ class Joinery:
     def _deployed_routes(
         self,
     ) -> List[Tuple[ApiGatewayApi, ApiGatewayRoute, ApiGatewayIntegration]]:
-        return AwsApiGatewayMount(Ontology())._mounts()
+        return AwsApiGatewayMount(self.ontology)._mounts()
 
     def _public_url(self, url: str) -> str:
         return f"[link={url}]public_url[/link]"
@@ -1,4 +1,4 @@
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from typing import cast, Dict, List, Union, Tuple
 from sentential.lib.mounts.spec import MountDriver
 from sentential.lib.clients import clients
@@ -42,7 +42,6 @@ class AwsApiGatewayMount(MountDriver):
         self.ontology: Ontology = ontology
         self.resource_name: str = self.ontology.context.resource_name
         self.resource_arn: str = self.ontology.context.resource_arn
-        self.provision = cast(Configs, self.ontology.configs.parameters)
 
         # set by _fetch_state
         self.path: str
@@ -54,6 +53,10 @@ class AwsApiGatewayMount(MountDriver):
         self.integration: Union[None, ApiGatewayIntegration]
         self.statement_id: str
 
+    @cached_property
+    def provision(self) -> Configs:
+        return cast(Configs, self.ontology.configs.parameters)
+
     @classmethod
     def autocomplete(cls) -> List[str]:
         completions = []
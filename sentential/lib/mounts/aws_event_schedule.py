@@ -1,3 +1,4 @@
+from functools import cached_property
 from typing import Dict, List, cast
 from sentential.lib.mounts.spec import MountDriver
 from sentential.lib.clients import clients
@@ -10,7 +11,10 @@ class AwsEventScheduleMount(MountDriver):
         self.ontology = ontology
         self.resource_name = self.ontology.context.resource_name
         self.resource_arn = self.ontology.context.resource_arn
-        self.provision = cast(Configs, self.ontology.configs.parameters)
+
+    @cached_property
+    def provision(self) -> Configs:
+        return cast(Configs, self.ontology.configs.parameters)
 
     def autocomplete(self) -> None:
         pass
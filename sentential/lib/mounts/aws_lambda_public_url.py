@@ -1,3 +1,4 @@
+from functools import cached_property
 from typing import Dict, List, cast
 from sentential.lib.clients import clients
 from sentential.lib.ontology import Ontology
@@ -8,7 +9,10 @@ class AwsLambdaPublicUrlMount:
     def __init__(self, ontology: Ontology) -> None:
         self.ontology = ontology
         self.resource_name = self.ontology.context.resource_name
-        self.provision = cast(Configs, self.ontology.configs.parameters)
+
+    @cached_property
+    def provision(self) -> Configs:
+        return cast(Configs, self.ontology.configs.parameters)
 
     def autocomplete(self) -> None:
         pass
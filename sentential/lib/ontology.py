@@ -1,78 +1,215 @@
 import os
 import sys
-from typing import List
+import re
+import json
+import hashlib
+from types import ModuleType
+from typing import Dict, List, Tuple
+from functools import cached_property
+from sentential.lib.backends import StoreBackend, store_backend
 from sentential.lib.context import Context
 from sentential.lib.store import Store
+from sentential.lib.shapes import LAMBDA_ENV_LIMIT
+from rich import print
 
 
-def load_user_defined_shapes():
+USER_DEFINED_SHAPES = ["Args", "Envs", "Secrets", "Tags"]
+
+# lambda refuses these as environment variable names, SSM_PATHS is ours
+LAMBDA_ENV_NAME = re.compile(r"^[a-zA-Z][a-zA-Z0-9_]+$")
+LAMBDA_ENV_RESERVED = re.compile(
+    r"^(_HANDLER|_X_AMZN_TRACE_ID|AWS_REGION|AWS_DEFAULT_REGION|AWS_EXECUTION_ENV|"
+    r"AWS_ACCESS_KEY_ID|AWS_SECRET_ACCESS_KEY|AWS_SESSION_TOKEN|AWS_LAMBDA_.*|"
+    r"LAMBDA_TASK_ROOT|LAMBDA_RUNTIME_DIR|SSM_PATHS)$"
+)
+
+# path -> ((mtime_ns, size), sha256, models)
+_user_defined_shapes: Dict[str, Tuple[Tuple[int, int], str, Dict[str, type]]] = {}
+
+
+def default_shapes() -> Dict[str, type]:
+    from sentential.lib import shapes
+
+    return {name: getattr(shapes, name) for name in USER_DEFINED_SHAPES}
+
+
+def load_user_defined_shapes() -> Dict[str, type]:
+    """resolve the user's store models, executing shapes.py only when its content changes"""
+    path = os.path.join(os.getcwd(), "shapes.py")
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return default_shapes()
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _user_defined_shapes.get(path)
+    if cached and cached[0] == signature:
+        return cached[2]
+
+    with open(path, "rb") as file:
+        source = file.read()
+    digest = hashlib.sha256(source).hexdigest()
+    if cached and cached[1] == digest:
+        _user_defined_shapes[path] = (signature, digest, cached[2])
+        return cached[2]
+
+    try:
+        module = _exec_shapes(path, source)
+    except ImportError:
+        return default_shapes()
+
+    defaults = default_shapes()
+    models = {name: getattr(module, name, defaults[name]) for name in defaults}
+    _user_defined_shapes[path] = (signature, digest, models)
+    return models
+
+
+def _exec_shapes(path: str, source: bytes) -> ModuleType:
     if os.getcwd() not in sys.path:
         sys.path.append(os.getcwd())
 
-    if "shapes" in sys.modules:
+    module = ModuleType("shapes")
+    module.__file__ = path
+    # pydantic resolves model references through sys.modules
+    sys.modules["shapes"] = module
+    try:
+        exec(compile(source, path, "exec"), module.__dict__)
+    except BaseException:
         del sys.modules["shapes"]
-
-    import shapes
+        raise
+    return module
 
 
 class Ontology:
     def __init__(self) -> None:
-        pass
+        self._stores: Dict[type, Store] = {}
+        self._prefetched = False
 
-    @property
+    @cached_property
     def context(self) -> Context:
         return Context()
 
+    @cached_property
+    def backend(self) -> StoreBackend:
+        return store_backend(self.context)
+
+    def _store(self, model: type) -> Store:
+        # one store per model, so stores share this ontology's context and resolve lazily
+        if model not in self._stores:
+            self._stores[model] = Store(
+                self.context, model, self.prefetch_stores, self.backend
+            )
+        return self._stores[model]
+
     @property
     def args(self) -> Store:
-        try:
-            load_user_defined_shapes()
-            from shapes import Args
-        except ImportError:
-            from sentential.lib.shapes import Args
-        return Store(self.context, Args)
+        return self._store(load_user_defined_shapes()["Args"])
 
     @property
     def envs(self) -> Store:
-        try:
-            load_user_defined_shapes()
-            from shapes import Envs
-        except ImportError:
-            from sentential.lib.shapes import Envs
-        return Store(self.context, Envs)
+        return self._store(load_user_defined_shapes()["Envs"])
 
     @property
     def secrets(self) -> Store:
-        try:
-            load_user_defined_shapes()
-            from shapes import Secrets
-        except ImportError:
-            from sentential.lib.shapes import Secrets
-        return Store(self.context, Secrets)
+        return self._store(load_user_defined_shapes()["Secrets"])
 
     @property
     def tags(self) -> Store:
-        try:
-            load_user_defined_shapes()
-            from shapes import Tags
-        except ImportError:
-            from sentential.lib.shapes import Tags
-        return Store(self.context, Tags)
+        return self._store(load_user_defined_shapes()["Tags"])
 
     @property
     def configs(self) -> Store:
         from sentential.lib.shapes import Configs
 
-        return Store(self.context, Configs)
+        return self._store(Configs)
+
+    @property
+    def stores(self) -> List[Store]:
+        return [self.args, self.envs, self.secrets, self.tags, self.configs]
+
+    def prefetch_stores(self) -> None:
+        """read every plain store's parameter in one batched backend call, once per ontology"""
+        if self._prefetched:
+            return
+        self._prefetched = True
+
+        # secrets are left to their own decrypting read, so listing envs needs no kms:Decrypt
+        stores = {
+            str(store.path): store for store in self.stores if not store.encrypted
+        }
+        fetched = self.backend.get({path: False for path in stores})
+        for path, (state, version) in fetched.items():
+            stores[path].seed(state, version)
+
+    def sync_stores(
+        self, source: StoreBackend, target: StoreBackend, stores: List[Store]
+    ) -> int:
+        """copy stores from one backend to another with one batched read per side, returns writes made"""
+        paths = {str(store.path): store.encrypted for store in stores}
+        sources, targets = source.get(paths), target.get(paths)
+        written = 0
+        for path, encrypted in paths.items():
+            (state, version), (current, current_version) = sources[path], targets[path]
+            if version == 0 and current_version != 0:
+                target.delete(path)
+            elif version != 0 and (current_version == 0 or state != current):
+                target.put(path, json.dumps(state), encrypted)
+            else:
+                continue
+            written += 1
 
-    def export_store_defaults(self) -> List[Store]:
-        stores = [self.args, self.envs, self.secrets, self.tags, self.configs]
         for store in stores:
-            store.export_defaults()
-        return stores
+            store.invalidate()
+        return written
+
+    def lambda_environment(self, bake_envs: bool = False) -> Dict[str, str]:
+        """environment variables for a deployed function. envs are resolved through SSM_PATHS
+        by the entry wrapper, unless baked in, which falls back to SSM_PATHS when they do not fit
+        """
+        paths = [str(self.envs.path), str(self.secrets.path)]
+        if not bake_envs:
+            return {"SSM_PATHS": ",".join(paths)}
+
+        baked = _environment(self.envs)
+        environment = {"SSM_PATHS": str(self.secrets.path), **baked}
+        size = sum(
+            len(k.encode("utf-8")) + len(v.encode("utf-8"))
+            for k, v in environment.items()
+        )
+        invalid = [
+            key
+            for key in baked
+            if not LAMBDA_ENV_NAME.match(key) or LAMBDA_ENV_RESERVED.match(key)
+        ]
+        if size > LAMBDA_ENV_LIMIT or invalid:
+            reason = (
+                f"invalid names {invalid}"
+                if invalid
+                else f"{size} bytes > {LAMBDA_ENV_LIMIT}"
+            )
+            print(f"not baking envs into the function ({reason}), using SSM_PATHS")
+            return {"SSM_PATHS": ",".join(paths)}
+        return environment
+
+    def store_environment(self) -> Dict[str, str]:
+        """envs and secrets as environment variables, for a container that cannot reach them in ssm"""
+        # secrets last, the order SSM_PATHS lists them in
+        return {**_environment(self.envs), **_environment(self.secrets)}
+
+    def export_store_defaults(self) -> int:
+        """export every store's defaults, returns how many unchanged writes were skipped"""
+        return sum(not store.export_defaults() for store in self.stores)
 
     def clear_stores(self) -> List[Store]:
-        stores = [self.args, self.envs, self.secrets, self.tags, self.configs]
+        stores = self.stores
         for store in stores:
             store.clear()
         return stores
+
+
+def _environment(store: Store) -> Dict[str, str]:
+    # pydantic encodes what json.dumps cannot, e.g. datetimes and nested models
+    return {
+        key: value if isinstance(value, str) else json.dumps(value)
+        for key, value in json.loads(store.parameters.json()).items()
+    }
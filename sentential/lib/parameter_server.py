@@ -0,0 +1,70 @@
+"""
+Serves a snapshot of ssm parameters with the ssm api shape, for `deploy local --cache-parameters`.
+
+Only uses the standard library, the file is mounted into a stock python container as-is:
+
+    python parameter_server.py parameters.json 8082
+"""
+import sys
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+# parameter name -> GetParameter "Parameter" shape
+Parameters = Dict[str, Dict]
+
+
+class ParameterHandler(BaseHTTPRequestHandler):
+    parameters: Parameters = {}
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._reply(400, _error("SerializationException", "invalid json"))
+
+        target = self.headers.get("X-Amz-Target", "").split(".")[-1]
+        if target == "GetParameters":
+            return self._reply(200, self.get_parameters(body.get("Names", [])))
+        if target == "GetParameter":
+            return self._reply(*self.get_parameter(body.get("Name", "")))
+        return self._reply(
+            400, _error("UnknownOperationException", f"{target} is not served")
+        )
+
+    def get_parameters(self, names) -> Dict:
+        found = [self.parameters[name] for name in names if name in self.parameters]
+        missing = [name for name in names if name not in self.parameters]
+        return {"Parameters": found, "InvalidParameters": missing}
+
+    def get_parameter(self, name: str) -> Tuple[int, Dict]:
+        if name not in self.parameters:
+            return 400, _error("ParameterNotFound", f"{name} not found")
+        return 200, {"Parameter": self.parameters[name]}
+
+    def _reply(self, status: int, body: Dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-amz-json-1.1")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def _error(type: str, message: str) -> Dict:
+    return {"__type": type, "message": message}
+
+
+def server(parameters: Parameters, port: int, host: str = "") -> ThreadingHTTPServer:
+    handler = type("Handler", (ParameterHandler,), {"parameters": parameters})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1]) as file:
+        parameters = json.load(file)
+    server(parameters, int(sys.argv[2])).serve_forever()
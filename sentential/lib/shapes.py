@@ -1,4 +1,5 @@
 import os
+import json
 from datetime import datetime
 from enum import Enum
 from pathlib import PosixPath
@@ -6,7 +7,7 @@ from typing import Any, List, Union, Optional, Dict, Literal
 from pydantic import Field, validator, Json, Extra
 from pydantic import BaseModel as BaseModel
 from sentential.lib.exceptions import ShapeError
-from sentential.lib.clients import clients
+from sentential.lib.cache import DiskCache
 
 
 #
@@ -15,6 +16,13 @@ from sentential.lib.clients import clients
 
 SNTL_WORKING_IMAGE_TAG = os.getenv("SNTL_WORKING_IMAGE_TAG", default=("cwi"))
 SNTL_ENTRY_VERSION = os.getenv("SNTL_ENTRY_VERSION", default=("0.4.2"))
+SNTL_ENTRY_IMAGE = "ghcr.io/linecard/entry"
+LAMBDA_ENV_LIMIT = 4096  # bytes, summed over every key and value
+MANIFEST_LIST_MEDIA_TYPES = [
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.index.v1+json",
+]
+SNTL_ARCH_CACHE_TTL = int(os.getenv("SNTL_ARCH_CACHE_TTL", default=(86400)))
 
 #
 # Store
@@ -83,13 +91,35 @@ class Configs(StoreModel):
 #   x86-64   amd64      # same
 
 
+def docker_endpoint() -> str:
+    """identify the docker daemon in use without asking the daemon"""
+    if "DOCKER_HOST" in os.environ:
+        return f"host:{os.environ['DOCKER_HOST']}"
+    if "DOCKER_CONTEXT" in os.environ:
+        return f"context:{os.environ['DOCKER_CONTEXT']}"
+    config_dir = os.getenv("DOCKER_CONFIG", default=os.path.expanduser("~/.docker"))
+    try:
+        with open(os.path.join(config_dir, "config.json")) as file:
+            return f"context:{json.load(file).get('currentContext', 'default')}"
+    except (OSError, ValueError):
+        return "context:default"
+
+
 class Architecture(Enum):
     amd64 = "amd64"
     arm64 = "arm64"
 
     @classmethod
     def system(cls):
-        sys_arch = clients.docker.system.info().architecture
+        cache = DiskCache("architecture", ttl=SNTL_ARCH_CACHE_TTL)
+        endpoint = docker_endpoint()
+        sys_arch = cache.get(endpoint)
+        if sys_arch is None:
+            from sentential.lib.clients import clients
+
+            sys_arch = clients.docker.system.info().architecture
+            cache.put(endpoint, sys_arch)
+
         try:
             normalized = {"aarch64": "arm64", "x86_64": "amd64", "x86-64": "amd64"}[
                 sys_arch
@@ -127,9 +157,12 @@ class AwsSSMParam(BaseModel):
 
 # describe_image()
 class AwsImageDescription(BaseModel):
+    registryId: Optional[str]
     imageDigest: str
     imageTags: Union[List[str], None]
     imageManifestMediaType: str
+    imagePushedAt: Optional[datetime]
+    imageSizeInBytes: Optional[int]
 
 
 class AwsImageDescriptions(BaseModel):
@@ -277,6 +310,32 @@ class AWSAssumeRole(BaseModel):
 #
 
 
+class StoreBackendName(str, Enum):
+    ssm = "ssm"
+    local = "local"
+
+
+class StoreOutput(str, Enum):
+    table = "table"
+    json = "json"
+    ndjson = "ndjson"
+
+
+class StoreFormat(str, Enum):
+    env = "env"
+    json = "json"
+    yaml = "yaml"
+
+    @classmethod
+    def from_path(cls, path: str) -> "StoreFormat":
+        suffix = PosixPath(path).suffix.lower()
+        if suffix == ".json":
+            return cls.json
+        if suffix in [".yaml", ".yml"]:
+            return cls.yaml
+        return cls.env
+
+
 class Runtimes(Enum):
     """https://gallery.ecr.aws/lambda?page=1"""
 
@@ -366,6 +425,51 @@ class AwsFunction(BaseModel):
     Code: AwsFunctionCode
 
 
+#
+# Dockerfile
+#
+
+
+class DockerfileStage(BaseModel):
+    base: str
+    name: Optional[str]
+    platform: Optional[str]
+    line: int
+
+
+class Dockerfile(BaseModel):
+    path: PosixPath
+    stages: List[DockerfileStage]
+    copied_from: List[str]
+
+    @property
+    def stage_names(self) -> List[str]:
+        return [stage.name for stage in self.stages if stage.name]
+
+    @property
+    def base_images(self) -> List[str]:
+        """external images, i.e. FROM references which are not earlier stages"""
+        images = []
+        for stage in self.stages:
+            if stage.base not in self.stage_names and stage.base not in images:
+                images.append(stage.base)
+        return images
+
+    @property
+    def repository_name(self) -> Optional[str]:
+        for stage in self.stages:
+            if stage.base == "runtime" and stage.name:
+                return stage.name
+        return None
+
+    @property
+    def entry_version(self) -> Optional[str]:
+        for image in [*self.base_images, *self.copied_from]:
+            if image.startswith(f"{SNTL_ENTRY_IMAGE}:"):
+                return image.split(":")[-1]
+        return None
+
+
 #
 # Pathing
 #
@@ -1,11 +1,15 @@
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from pathlib import PosixPath
 from rich.table import Table, box
-from typing import Any, Dict, List, Optional, Tuple, cast, Type, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast, Type, Union
 from pydantic import BaseModel, Json, ValidationError
-from sentential.lib.clients import clients
+from sentential.lib.backends import SsmBackend, StoreBackend
 from sentential.lib.context import Context
-from sentential.lib.shapes import AwsSSMParam, Args, Envs, Secrets, Tags, Configs
+from sentential.lib.exceptions import StoreError
+from sentential.lib.shapes import Args, Envs, Secrets, Tags, Configs
 
 VALID_MODEL_TYPES = Union[
     Type[Args], Type[Envs], Type[Secrets], Type[Tags], Type[Configs]
@@ -13,6 +17,12 @@ VALID_MODEL_TYPES = Union[
 VALID_MODELS = Union[Args, Envs, Secrets, Tags, Configs]
 
 
+def _digest(value: str) -> str:
+    # canonical form, so key order and whitespace do not count as a change
+    canonical = json.dumps(json.loads(value), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 class ValidationErrorInfo(BaseModel):
     key: str
     loc: Tuple
@@ -27,27 +37,67 @@ class StoreTableRow(BaseModel):
     validation: Optional[Any]
 
 
+class PartitionSyncRow(BaseModel):
+    partition: str
+    result: str
+
+
 class Store:
     # TODO: the fact that this must take Context instead of Ontology, is because this belongs in an Epistemology.
     # The conflation of the two logically leads to a circular import. A part of our Epistemology is our Ontology (prior knowledge).
-    def __init__(self, context: Context, model: VALID_MODEL_TYPES) -> None:
-        self.kms_key_id = context.kms_key_id
-        self.partition: str = context.partition
-        self.repo: str = context.repository_name
-        self.root: PosixPath = PosixPath(f"/{self.partition}/{self.repo}")
+    # Nothing is resolved at construction, partition and repository name cost an STS call and a
+    # Dockerfile read, so a store that is never read or written costs nothing.
+    def __init__(
+        self,
+        context: Context,
+        model: VALID_MODEL_TYPES,
+        prefetch: Optional[Callable[[], None]] = None,
+        backend: Optional[StoreBackend] = None,
+    ) -> None:
+        self.context = context
+        self.backend = backend or SsmBackend(context)
         self.model: VALID_MODEL_TYPES = model
-        self.path: PosixPath = self.root.joinpath(PosixPath(model.__name__))
         self.encrypted: bool = "secret" in model.__name__.lower()
+        # local copy of the parameter and the Version it was read or written at,
+        # version 0 meaning the parameter does not exist. None means nothing is held.
+        self._prefetch = prefetch
+        self._state: Optional[Dict] = None
+        self._version: Optional[int] = None
+
+    @cached_property
+    def partition(self) -> str:
+        return self.context.partition
+
+    @cached_property
+    def repo(self) -> str:
+        return self.context.repository_name
+
+    @cached_property
+    def root(self) -> PosixPath:
+        return PosixPath(f"/{self.partition}/{self.repo}")
+
+    @cached_property
+    def path(self) -> PosixPath:
+        return self.root.joinpath(PosixPath(self.model.__name__))
+
+    def seed(self, state: Dict, version: int) -> None:
+        self._state, self._version = state, version
+
+    def invalidate(self) -> None:
+        self._state, self._version = None, None
 
     @property
     def state(self) -> Dict:
-        try:
-            resp = clients.ssm.get_parameter(
-                Name=str(self.path), WithDecryption=self.encrypted
-            )
-            return json.loads(AwsSSMParam(**resp["Parameter"]).Value)
-        except clients.ssm.exceptions.ParameterNotFound:
-            return json.loads("{}")
+        if self._state is None and self._prefetch:
+            self._prefetch()
+        if self._state is None:
+            return self._fetch()
+        return self._state.copy()
+
+    def _fetch(self) -> Dict:
+        path = str(self.path)
+        self.seed(*self.backend.get({path: self.encrypted})[path])
+        return cast(Dict, self._state).copy()
 
     # TODO: this probably could use a rename
     @property
@@ -55,15 +105,13 @@ class Store:
         return self.model(**self.state)
 
     def _write_parameters(self, dict: Dict) -> VALID_MODELS:
-        params = {}
-        params["Name"] = str(self.path)
-        params["Value"] = self.model.construct(**dict).json()
-        params["Overwrite"] = True
-        params["Tier"] = "Standard"
-        params["Type"] = "SecureString" if self.encrypted else "String"
-        if params["Type"] == "SecureString":
-            params["KeyId"] = self.kms_key_id
-        clients.ssm.put_parameter(**params)
+        value = self.model.construct(**dict).json()
+        version = self.backend.put(str(self.path), value, self.encrypted)
+        if self._version is not None and version == self._version + 1:
+            # nobody wrote in between, so what we wrote is what the backend holds
+            self.seed(json.loads(value), version)
+        else:
+            self.invalidate()
         return self._read()
 
     def _read(self) -> VALID_MODELS:
@@ -75,12 +123,74 @@ class Store:
         except json.JSONDecodeError:
             parsed = value
 
-        merged = self.state | {key: parsed}
+        # read-modify-write goes to ssm, a held copy may predate a concurrent write
+        merged = self._fetch() | {key: parsed}
         self._write_parameters(merged)
         return self.ls()
 
+    def merge(self, values: Dict[str, Any]) -> Table:
+        """set many keys at once, one read and one write, refused if any of them is invalid"""
+        merged = self._fetch() | values
+        errors = [error for error in self.validate(merged) if error.key in values]
+        if errors:
+            details = ", ".join(f"{error.key}: {error.msg}" for error in errors)
+            raise StoreError(f"not importing into {self.model.__name__}, {details}")
+        self._write_parameters(merged)
+        return self.ls()
+
+    def export(self) -> Dict:
+        return self.state
+
+    def sync(
+        self,
+        source: str,
+        targets: List[str],
+        merge: bool = False,
+        keys: Optional[List[str]] = None,
+        workers: int = 8,
+    ) -> Table:
+        """copy this store from one partition to others, `all` being every other partition found"""
+        suffix = f"/{self.repo}/{self.model.__name__}"
+        found = self.backend.scan(suffix, self.encrypted)
+        held = {path.split("/")[1]: fetched for path, fetched in found.items()}
+        if source not in held:
+            raise StoreError(f"no {self.model.__name__} store in partition {source}")
+        if targets == ["all"]:
+            targets = sorted(held)
+        targets = [target for target in targets if target != source]
+
+        state = held[source][0]
+        if keys:
+            state = {key: state[key] for key in keys if key in state}
+        if self.encrypted:
+            self.context.kms_key_id  # resolve once, not from every worker
+
+        def copy(target: str) -> str:
+            current, version = held.get(target, ({}, 0))
+            desired = current | state if merge or keys else state
+            if version != 0 and _digest(json.dumps(desired)) == _digest(
+                json.dumps(current)
+            ):
+                return "unchanged"
+            try:
+                path = f"/{target}{suffix}"
+                written = self.backend.put(path, json.dumps(desired), self.encrypted)
+                return f"written (version {written})"
+            except Exception as e:
+                return f"[red]failed: {e}[/red]"
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets)))) as pool:
+            results = list(pool.map(copy, targets))
+
+        if self.partition in targets:
+            self.invalidate()
+        table = Table(*PartitionSyncRow.schema()["properties"].keys(), box=box.SIMPLE)
+        for target, result in zip(targets, results):
+            table.add_row(target, result)
+        return table
+
     def rm(self, key: str) -> Table:
-        mutated = self.state.copy()
+        mutated = self._fetch()
         try:
             del mutated[key]
             self._write_parameters(mutated)
@@ -88,19 +198,25 @@ class Store:
             pass
         return self.ls()
 
-    def export_defaults(self) -> None:
-        self._write_parameters(self.parameters.dict())
+    def export_defaults(self) -> bool:
+        """write defaults back to ssm, returns False when the stored value already matched"""
+        current = self.state
+        defaults = self.model(**current).dict()
+        rendered = self.model.construct(**defaults).json()
+        # version 0 means the parameter does not exist yet, which is always a change
+        if self._version != 0 and _digest(rendered) == _digest(json.dumps(current)):
+            return False
+        self._write_parameters(defaults)
+        return True
 
     def clear(self) -> Table:
-        try:
-            clients.ssm.delete_parameter(Name=str(self.path))
-        except clients.ssm.exceptions.ParameterNotFound:
-            pass
+        self.backend.delete(str(self.path))
+        self.seed({}, 0)
         return self.ls()
 
-    def validate(self) -> List[ValidationErrorInfo]:
+    def validate(self, state: Optional[Dict] = None) -> List[ValidationErrorInfo]:
         try:
-            self.parameters
+            self.model(**(self.state if state is None else state))
             return []
         except ValidationError as e:
             errors = []
@@ -109,47 +225,31 @@ class Store:
                 errors.append(ValidationErrorInfo(key=error["loc"][0], **error))
             return errors
 
-    def ls(self) -> Table:
-        data = self._read()
-        schema = data.schema()
-        properties = schema["properties"]
-        validations = self.validate()
-        columns = list(StoreTableRow.schema()["properties"].keys())
-        table = Table(*columns, box=box.SIMPLE)
-        rows: List[StoreTableRow] = []
+    def rows(self) -> List[StoreTableRow]:
+        """schema, values and validations joined by key in one pass over each"""
+        data = self._read().dict()
+        validations = {error.key: error.msg for error in self.validate()}
+        rows: Dict[str, StoreTableRow] = {}
 
-        # add rows found in schema
-        for key, meta in properties.items():
-            desc = meta["description"] if "description" in meta else None
-            rows.append(
-                StoreTableRow(key=key, value=None, description=desc, validation=None)
+        # rows found in schema, then rows for data _not_ in schema
+        for key, meta in self.model.schema()["properties"].items():
+            rows[key] = StoreTableRow(
+                key=key, value=data.get(key), description=meta.get("description")
             )
+        for key, value in data.items():
+            if key not in rows:
+                rows[key] = StoreTableRow(key=key, value=value)
 
-        # populate existent values for properties defined in schema
-        for row in rows:
-            for key, value in data.dict().items():
-                if row.key == key:
-                    row.value = value
-
-        # add rows for data _not_ in schema
-        for key, value in data.dict().items():
-            if not any([row.key == key for row in rows]):
-                rows.append(
-                    StoreTableRow(
-                        key=key, value=value, description=None, validation=None
-                    )
-                )
-
-        # populate validation information for each row
-        for row in rows:
-            for validation in validations:
-                if row.key == validation.key:
-                    row.validation = f"[red]{validation.msg}[/red]"
-
-        # dump it into a renderable table object
-        for row in rows:
-            values = list(row.dict().values())
-            values = [str(v) for v in values]
-            table.add_row(*values)
+        for key, msg in validations.items():
+            if key in rows:
+                rows[key].validation = msg
+        return list(rows.values())
 
+    def ls(self) -> Table:
+        columns = list(StoreTableRow.schema()["properties"].keys())
+        table = Table(*columns, box=box.SIMPLE)
+        for row in self.rows():
+            if row.validation is not None:
+                row.validation = f"[red]{row.validation}[/red]"
+            table.add_row(*[str(v) for v in row.dict().values()])
         return table
@@ -0,0 +1,90 @@
+import json
+import shlex
+import yaml
+from typing import Any, Dict, List
+from sentential.lib.exceptions import StoreError
+from sentential.lib.shapes import StoreFormat
+
+
+def parse_value(value: str) -> Any:
+    """json if it parses as json, the raw string otherwise (same as `sntl <store> set`)"""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def parse_pairs(pairs: List[str]) -> Dict[str, Any]:
+    values = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep or not key.strip():
+            raise StoreError(f"expected KEY=VALUE, got {pair!r}")
+        values[key.strip()] = parse_value(value)
+    return values
+
+
+def parse_dotenv(text: str) -> Dict[str, Any]:
+    values = {}
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("export "):
+            line = line[len("export ") :].lstrip()
+
+        key, sep, value = line.partition("=")
+        if not sep or not key.strip():
+            raise StoreError(f"line {number}: expected KEY=VALUE, got {line!r}")
+        key, value = key.strip(), value.strip()
+
+        if value[:1] in ['"', "'"]:
+            # quoted values are always strings, shlex handles escapes and trailing comments
+            words = shlex.split(value, comments=True)
+            values[key] = words[0] if words else ""
+        else:
+            try:
+                values[key] = json.loads(value)
+            except json.JSONDecodeError:
+                values[key] = parse_value(value.split(" #", 1)[0].strip())
+    return values
+
+
+def load_values(text: str, format: StoreFormat) -> Dict[str, Any]:
+    if format == StoreFormat.env:
+        return parse_dotenv(text)
+
+    if format == StoreFormat.json:
+        try:
+            values = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise StoreError(f"invalid json: {e}")
+    else:
+        try:
+            values = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise StoreError(f"invalid yaml: {e}")
+
+    if values is None:
+        return {}
+    if not isinstance(values, dict):
+        raise StoreError(f"expected a {format.value} mapping of keys to values")
+    return values
+
+
+def dump_values(values: Dict[str, Any], format: StoreFormat) -> str:
+    if format == StoreFormat.json:
+        return json.dumps(values, indent=2)
+
+    if format == StoreFormat.yaml:
+        return yaml.safe_dump(values, default_flow_style=False).rstrip("\n")
+
+    lines = []
+    for key, value in values.items():
+        # strings are always quoted so they read back as strings, everything else as json
+        if isinstance(value, str):
+            value = "'" + value.replace("'", "'\"'\"'") + "'"
+        else:
+            value = json.dumps(value, separators=(",", ":"))
+        lines.append(f"{key}={value}")
+    return "\n".join(lines)
@@ -1,40 +1,40 @@
 from sentential.cli.root import root
-from sentential.cli.store import store
-from sentential.cli.deploy import deploy
-from sentential.cli.destroy import destroy
-from sentential.cli.mount import mount
-from sentential.cli.umount import umount
-from sentential.cli.invoke import invoke
-from sentential.cli.logs import logs
-from sentential.cli.policy import policy
+from sentential.cli.lazy import LazyGroup, LazyTyperInfo
 from sentential.lib.assurances import Assurances
 
 from sentential.lib.exceptions import (
     SntlException,
-    DockerException,
     AWS_EXCEPTIONS,
     ValidationError,
+    raised_by_docker,
 )
 
-root.add_typer(store, name="args", help="build arguments")
-root.add_typer(store, name="envs", help="environment variables")
-root.add_typer(store, name="secrets", help="secrets")
-root.add_typer(store, name="configs", help="provisioning")
-root.add_typer(store, name="tags", help="tagging")
-root.add_typer(
-    deploy, name="deploy", help="create deployment", callback=Assurances.deploy
-)
-root.add_typer(destroy, name="destroy", help="destroy deployment")
-root.add_typer(mount, name="mount", help="mount integration")
-root.add_typer(umount, name="umount", help="unmount integration")
-root.add_typer(invoke, name="invoke", help="invoke function")
-root.add_typer(logs, name="logs", help="logging")
-root.add_typer(
-    policy,
-    name="policy",
-    help="inspect and render policy.json",
-    callback=Assurances.render,
-)
+# sub-apps are only imported once their command path is selected
+LAZY_TYPERS = [
+    LazyTyperInfo("sentential.cli.store:store", "args", "build arguments"),
+    LazyTyperInfo("sentential.cli.store:store", "envs", "environment variables"),
+    LazyTyperInfo("sentential.cli.store:store", "secrets", "secrets"),
+    LazyTyperInfo("sentential.cli.store:store", "configs", "provisioning"),
+    LazyTyperInfo("sentential.cli.store:store", "tags", "tagging"),
+    LazyTyperInfo(
+        "sentential.cli.deploy:deploy",
+        "deploy",
+        "create deployment",
+        Assurances.deploy,
+    ),
+    LazyTyperInfo("sentential.cli.destroy:destroy", "destroy", "destroy deployment"),
+    LazyTyperInfo("sentential.cli.mount:mount", "mount", "mount integration"),
+    LazyTyperInfo("sentential.cli.umount:umount", "umount", "unmount integration"),
+    LazyTyperInfo("sentential.cli.invoke:invoke", "invoke", "invoke function"),
+    LazyTyperInfo("sentential.cli.logs:logs", "logs", "logging"),
+    LazyTyperInfo(
+        "sentential.cli.policy:policy",
+        "policy",
+        "inspect and render policy.json",
+        Assurances.render,
+    ),
+]
+root.info.cls = LazyGroup.of(LAZY_TYPERS)
 
 
 def main():
@@ -46,6 +46,8 @@ def main():
     except AWS_EXCEPTIONS as e:
         print(f"AWS: {e}")
         exit(1)
-    except DockerException as e:
+    except Exception as e:
+        if not raised_by_docker(e):
+            raise
         print(f"DOCKER: {e}")
         exit(e.return_code)
@@ -0,0 +1,62 @@
+import sys
+import json
+import subprocess
+from typing import Dict, List, NamedTuple
+import pytest
+from sentential.lib.clients import SERVICES
+
+# clients each command actually touches, eager construction paid for all of them
+COMMANDS: Dict[str, List[str]] = {
+    "envs ls": ["sts", "kms", "ssm"],
+    "policy cat": ["sts", "kms", "ssm"],
+    "publish": ["sts", "kms", "ssm", "ecr"],
+    "invoke aws": ["sts", "lmb"],
+}
+
+SNIPPET = """
+import json
+from time import perf_counter
+start = perf_counter()
+from sentential.lib.clients import clients, SERVICES
+for name in {names}:
+    getattr(clients, name)
+seconds = perf_counter() - start
+print(json.dumps({{"seconds": seconds, "built": [n for n in SERVICES if n in clients.__dict__]}}))
+"""
+
+
+class ColdStart(NamedTuple):
+    seconds: float
+    built: List[str]
+
+
+def cold_start(names: List[str], runs: int = 5) -> ColdStart:
+    # timings are reported, not asserted, they are too noisy on a loaded machine
+    starts = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(names=names)],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        starts.append(ColdStart(**json.loads(out.stdout)))
+    return min(starts)
+
+
+@pytest.fixture(scope="module")
+def eager() -> ColdStart:
+    return cold_start(list(SERVICES.keys()))
+
+
+class TestClientsColdStart:
+    def test_eager_builds_all(self, eager: ColdStart):
+        assert eager.built == list(SERVICES.keys())
+
+    @pytest.mark.parametrize("command", COMMANDS.keys())
+    def test_per_command_saving(self, eager: ColdStart, command: str):
+        lazy = cold_start(COMMANDS[command])
+        print(
+            f"\n{command}: eager {eager.seconds:.3f}s, lazy {lazy.seconds:.3f}s, saved {eager.seconds - lazy.seconds:.3f}s"
+        )
+        assert lazy.built == [name for name in SERVICES if name in COMMANDS[command]]
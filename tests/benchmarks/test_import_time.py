@@ -0,0 +1,84 @@
+import sys
+import subprocess
+from typing import Dict, List, NamedTuple, Set
+import pytest
+
+# importtime does not report modules loaded via importlib, so loaded modules are dumped at exit
+SNIPPET = """
+import sys
+import atexit
+atexit.register(lambda: sys.stderr.write("".join(f"loaded: {{m}}\\n" for m in sys.modules)))
+sys.argv = ["sntl", *{path}, "--help"]
+from sentential.sntl import main
+main()
+"""
+
+# modules a command path must not drag in just to resolve itself
+FORBIDDEN: Dict[str, List[str]] = {
+    "": ["boto3", "python_on_whales", "jinja2", "sentential.lib.store"],
+    "envs": ["python_on_whales", "jinja2", "sentential.cli.deploy"],
+    "configs": ["python_on_whales", "jinja2", "sentential.cli.deploy"],
+    "policy": ["python_on_whales", "sentential.cli.store"],
+    "init": ["boto3", "python_on_whales", "sentential.lib.store"],
+}
+
+# lazy sub-app command paths and the module each one should load
+SUB_APPS: Dict[str, str] = {
+    "args": "sentential.cli.store",
+    "envs": "sentential.cli.store",
+    "secrets": "sentential.cli.store",
+    "configs": "sentential.cli.store",
+    "tags": "sentential.cli.store",
+    "deploy": "sentential.cli.deploy",
+    "destroy": "sentential.cli.destroy",
+    "mount": "sentential.cli.mount",
+    "umount": "sentential.cli.umount",
+    "invoke": "sentential.cli.invoke",
+    "logs": "sentential.cli.logs",
+    "policy": "sentential.cli.policy",
+}
+
+PATHS = ["", "init", *SUB_APPS]
+
+
+class ImportProfile(NamedTuple):
+    total_us: int
+    loaded: Set[str]
+
+
+def profile(path: str) -> ImportProfile:
+    """import cost of resolving `sntl <path> --help` in a fresh interpreter"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET.format(path=path.split())],
+        capture_output=True,
+        text=True,
+    )
+    total, loaded = 0, set()
+    for line in out.stderr.splitlines():
+        if line.startswith("loaded: "):
+            loaded.add(line.replace("loaded: ", ""))
+        elif line.startswith("import time:") and "|" in line:
+            self_us = line.replace("import time:", "").split("|")[0].strip()
+            total += int(self_us) if self_us.isdigit() else 0
+    return ImportProfile(total, loaded)
+
+
+class TestImportTime:
+    @pytest.mark.parametrize("path", PATHS)
+    def test_subcommand_imports(self, path: str):
+        result = profile(path)
+        print(f"\nsntl {path}: {result.total_us / 1000:.1f}ms")
+        for module in FORBIDDEN.get(path, []):
+            assert module not in result.loaded
+
+    @pytest.mark.parametrize("path", SUB_APPS)
+    def test_only_selected_sub_app(self, path: str):
+        loaded = profile(path).loaded
+        assert SUB_APPS[path] in loaded
+        assert not (set(SUB_APPS.values()) - {SUB_APPS[path]}) & loaded
+
+    def test_sub_apps_match_registry(self):
+        from sentential.sntl import LAZY_TYPERS
+
+        registry = {info.name: info.target.split(":")[0] for info in LAZY_TYPERS}
+        assert registry == SUB_APPS
@@ -0,0 +1,54 @@
+import json
+from time import perf_counter
+from typing import List
+import pytest
+from helpers import content_digest, generate_manifest_list_manifest
+from sentential.lib.clients import clients
+from sentential.lib.ontology import Ontology
+from sentential.lib.drivers.aws_ecr import AwsEcrDriver, SemVer
+from sentential.lib.shapes import AwsManifestList
+
+TAGS = 2000
+TAGS_PER_DIGEST = 10  # moto scans every image on put, fewer digests keep setup quick
+
+
+@pytest.fixture(scope="class")
+def tagged_repo(ontology: Ontology):
+    repo_name = ontology.context.repository_name
+    clients.ecr.create_repository(repositoryName=repo_name)
+    for n in range(TAGS):
+        manifest_list = AwsManifestList(
+            manifests=[
+                generate_manifest_list_manifest(
+                    f"sha256:{n // TAGS_PER_DIGEST:064x}", 1024
+                )
+            ]
+        ).json()
+        clients.ecr.put_image(
+            repositoryName=repo_name,
+            imageManifest=manifest_list,
+            imageDigest=content_digest(manifest_list),
+            imageTag=f"{n // 400}.{n // 20 % 20}.{n % 20}",
+        )
+    yield
+    clients.ecr.delete_repository(repositoryName=repo_name, force=True)
+
+
+@pytest.mark.usefixtures("moto", "init", "ontology", "tagged_repo")
+class TestPublishVersion:
+    def test_tag_index(self, ecr_calls: List[str]):
+        start = perf_counter()
+        version = AwsEcrDriver(Ontology()).next()
+        indexed = perf_counter() - start
+        assert version == "4.19.20"
+        assert "BatchGetImage" not in ecr_calls
+
+        start = perf_counter()
+        manifest_lists = AwsEcrDriver(Ontology())._manifest_lists()
+        assert SemVer([m.imageId.imageTag for m in manifest_lists]).next() == version
+        fetched = perf_counter() - start
+
+        # timings are reported, not asserted, they are too noisy on a loaded machine
+        print(
+            f"\n{TAGS} tags: tag index {indexed:.3f}s, manifests {fetched:.3f}s, saved {fetched - indexed:.3f}s"
+        )
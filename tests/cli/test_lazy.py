@@ -0,0 +1,42 @@
+import pytest
+import typer
+from typer.testing import CliRunner
+from sentential.sntl import LAZY_TYPERS, root
+from sentential.cli.lazy import LazyGroup, LazyTyperInfo
+
+runner = CliRunner()
+
+
+class TestLazyGroup:
+    def test_help_lists_lazy_typers(self):
+        result = runner.invoke(root, ["--help"])
+        for info in LAZY_TYPERS:
+            assert info.name in result.stdout
+            assert info.help in result.stdout
+
+    @pytest.mark.parametrize("info", LAZY_TYPERS, ids=lambda info: info.name)
+    def test_stub_matches_loaded(self, info: LazyTyperInfo):
+        group = LazyGroup()
+        stub, loaded = group._stub(info), group._load(info)
+        assert stub.name == loaded.name
+        assert stub.help == loaded.help
+        assert stub.short_help == loaded.short_help
+
+    def test_resolves_sub_app(self):
+        result = runner.invoke(root, ["envs", "--help"])
+        assert result.exit_code == 0
+        assert "list store" in result.stdout
+
+    def test_completion_lists_lazy_typers(self):
+        group = typer.main.get_command(root)
+        ctx = group.make_context("sntl", [], resilient_parsing=True)
+        completions = [item.value for item in group.shell_complete(ctx, "")]
+        assert {info.name for info in LAZY_TYPERS}.issubset(completions)
+        assert "build" in completions
+
+    def test_registry_per_group(self):
+        bound = LazyGroup.of(LAZY_TYPERS)
+        first, second = bound(), bound()
+        first.lazy_typers.pop("envs")
+        assert "envs" in second.lazy_typers
+        assert LazyGroup().lazy_typers == {}
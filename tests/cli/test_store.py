@@ -0,0 +1,119 @@
+import json
+import pytest
+from os import remove
+from shutil import copyfile
+from typing import List
+from typer.testing import CliRunner
+from sentential.sntl import root
+from sentential.lib.exceptions import StoreError
+from sentential.lib.ontology import Ontology
+from sentential.lib.values import parse_pairs
+
+
+@pytest.fixture()
+def ssm_writes(record_calls):
+    return record_calls("ssm", operation="PutParameter")
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestStoreImportExport:
+    @pytest.fixture(autouse=True)
+    def clean(self):
+        Ontology().clear_stores()
+
+    def test_import_pairs(self, invoke, ssm_writes: List[str]):
+        result = invoke(["envs", "import", "A=1", "B=two", 'C=["x"]'])
+        assert result.exit_code == 0
+        assert Ontology().envs.state == {"A": 1, "B": "two", "C": ["x"]}
+        assert len(ssm_writes) == 1
+
+    def test_import_dotenv(self, invoke, ssm_writes: List[str]):
+        with open(".env", "w") as file:
+            file.write("# comment\nexport A=1\nB='123'\nC=\"quoted # not a comment\"\n")
+        result = invoke(["envs", "import", "--file", ".env", "A=2"])
+        assert result.exit_code == 0
+        assert Ontology().envs.state == {
+            "A": 2,
+            "B": "123",
+            "C": "quoted # not a comment",
+        }
+        assert len(ssm_writes) == 1
+
+    def test_import_json_and_yaml(self, invoke):
+        with open("values.json", "w") as file:
+            json.dump({"A": 1, "B": {"nested": True}}, file)
+        with open("values.yml", "w") as file:
+            file.write("C: three\n")
+        assert invoke(["envs", "import", "-f", "values.json"]).exit_code == 0
+        assert invoke(["envs", "import", "-f", "values.yml"]).exit_code == 0
+        assert Ontology().envs.state == {"A": 1, "B": {"nested": True}, "C": "three"}
+
+    def test_import_stdin(self):
+        result = CliRunner().invoke(
+            root, ["envs", "import", "-f", "-", "--format", "json"], input='{"A": 1}'
+        )
+        assert result.exit_code == 0
+        assert Ontology().envs.state == {"A": 1}
+
+    def test_export_round_trip(self, invoke):
+        values = {"A": 1, "B": "123", "C": "it's", "D": [1, "2"]}
+        Ontology().envs.merge(values)
+        for format in ["env", "json", "yaml"]:
+            result = invoke(["envs", "export", "--format", format])
+            assert result.exit_code == 0
+            Ontology().envs.clear()
+            with open(f"export.{format}", "w") as file:
+                file.write(result.stdout)
+            invoke(["envs", "import", "-f", f"export.{format}"])
+            assert Ontology().envs.state == values
+
+    def test_invalid_import_not_written(self, ssm_writes: List[str]):
+        copyfile("./fixtures/shapes.py", "shapes.py")
+        try:
+            with pytest.raises(StoreError):
+                Ontology().envs.merge({"required_env": "nope", "optional_env": "x"})
+            assert ssm_writes == []
+
+            # other missing required keys do not block an import
+            Ontology().args.merge({"optional_arg": "x"})
+            assert Ontology().args.state == {"optional_arg": "x"}
+        finally:
+            remove("shapes.py")
+
+    def test_malformed_pair(self, invoke, ssm_writes: List[str]):
+        with pytest.raises(StoreError):
+            parse_pairs(["novalue"])
+        with pytest.raises(StoreError):
+            invoke(["envs", "import", "A=1", "novalue"])
+        assert ssm_writes == []
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestStoreLsOutput:
+    @pytest.fixture(autouse=True)
+    def defined(self):
+        Ontology().clear_stores()
+        copyfile("./fixtures/shapes.py", "shapes.py")
+        yield
+        remove("shapes.py")
+
+    def test_json(self, invoke):
+        invoke(["envs", "set", "required_env", "not-an-int"])
+        invoke(["envs", "set", "undefined_env", "x"])
+        result = invoke(["envs", "ls", "--output", "json"])
+        assert result.exit_code == 0
+        rows = {row["key"]: row for row in json.loads(result.stdout)}
+        assert list(rows) == ["required_env", "optional_env", "undefined_env"]
+        assert rows["required_env"]["value"] == "not-an-int"
+        assert rows["required_env"]["description"] == "required"
+        assert "integer" in rows["required_env"]["validation"]
+        assert rows["optional_env"]["value"] == "default_value"
+        assert rows["optional_env"]["validation"] is None
+        assert rows["undefined_env"]["validation"] == "extra fields not permitted"
+
+    def test_ndjson(self, invoke):
+        invoke(["envs", "set", "required_env", "1"])
+        result = invoke(["envs", "ls", "--output", "ndjson"])
+        rows = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [row["key"] for row in rows] == ["required_env", "optional_env"]
+        assert rows[0]["value"] == 1
@@ -9,4 +9,5 @@ from tests.fixtures.drivers import (
     local_lambda_driver,
 )
 from tests.fixtures.mounts import api_gateway_mount
-from tests.fixtures.common import cwi, mock_repo, mock_api_gateway
+from tests.fixtures.common import isolated_dirs, cwi, mock_repo, mock_api_gateway
+from tests.fixtures.calls import record_calls, ssm_calls, ecr_calls
@@ -0,0 +1,36 @@
+import pytest
+from typing import Callable, List
+from sentential.lib.clients import clients
+
+
+@pytest.fixture()
+def record_calls():
+    """record_calls("ssm", "kms") lists the operations those clients call, optionally only one"""
+    registered = []
+
+    def record(*services: str, operation: str = "") -> List[str]:
+        calls: List[str] = []
+
+        def count(**kwargs):
+            if not operation or kwargs["model"].name == operation:
+                calls.append(kwargs["model"].name)
+
+        for service in services:
+            client = getattr(clients, service)
+            client.meta.events.register("before-call", count)
+            registered.append((client, count))
+        return calls
+
+    yield record
+    for client, count in registered:
+        client.meta.events.unregister("before-call", count)
+
+
+@pytest.fixture()
+def ssm_calls(record_calls: Callable[..., List[str]]) -> List[str]:
+    return record_calls("ssm")
+
+
+@pytest.fixture()
+def ecr_calls(record_calls: Callable[..., List[str]]) -> List[str]:
+    return record_calls("ecr")
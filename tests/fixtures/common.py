@@ -1,11 +1,35 @@
 from typing import cast
 import pytest
 import json
+from sentential.lib import backends, cache
 from sentential.lib.clients import clients
 from sentential.lib.ontology import Ontology
 from sentential.lib.drivers.local_images import LocalImagesDriver
 from sentential.lib.shapes import AwsImageDetail, Architecture, ApiGatewayApi
-from tests.helpers import generate_image_manifest, generate_image_manifest_list
+from tests.helpers import (
+    content_digest,
+    generate_image_manifest,
+    generate_image_manifest_list,
+)
+
+
+#
+# Isolation
+#
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_dirs(tmp_path_factory: pytest.TempPathFactory):
+    """keep the suite, and the sntl subprocesses it spawns, out of the user's cache and stores"""
+    cache_dir = str(tmp_path_factory.mktemp("cache"))
+    store_db = str(tmp_path_factory.mktemp("share") / "stores.db")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SNTL_CACHE_DIR", cache_dir)
+        monkeypatch.setenv("SNTL_STORE_DB", store_db)
+        # both are read once at import, which conftest has already done
+        monkeypatch.setattr(cache, "SNTL_CACHE_DIR", cache_dir)
+        monkeypatch.setattr(backends, "SNTL_STORE_DB", store_db)
+        yield
 
 
 #
@@ -41,11 +65,11 @@ def popluate_mock_images(repo_name):
         image_pairs.append(image_pair)
 
     for build, image_pair in enumerate(image_pairs):
-        manifest_list = generate_image_manifest_list(image_pair)
-
+        manifest_list = json.dumps(generate_image_manifest_list(image_pair).dict())
         clients.ecr.put_image(
             repositoryName=repo_name,
-            imageManifest=json.dumps(manifest_list.dict()),
+            imageManifest=manifest_list,
+            imageDigest=content_digest(manifest_list),
             imageTag=f"0.0.{build}",
         )
 
@@ -38,6 +38,11 @@ def rewrite(file: str, target: str, replace: str) -> None:
 
 
 # ECR Mock Data
+def content_digest(manifest: str) -> str:
+    # what ecr reports, moto draws manifest list digests from only 101 random values
+    return f"sha256:{hashlib.sha256(manifest.encode('utf-8')).hexdigest()}"
+
+
 def generate_random_sha():
     sha = hashlib.sha256(f"{random.randint(0,100)}".encode("utf-8")).hexdigest()
     return f"sha256:{sha}"
@@ -1,8 +1,18 @@
 import pytest
 import os
+import json
+from typing import List
+from pytest import MonkeyPatch
+from helpers import (
+    content_digest,
+    generate_image_manifest,
+    generate_manifest_list_manifest,
+)
+from tests.fixtures.common import popluate_mock_images
+from sentential.lib import cache
 
 from sentential.lib.ontology import Ontology
-from sentential.lib.drivers.aws_ecr import AwsEcrDriver
+from sentential.lib.drivers.aws_ecr import AwsEcrDriver, SemVer
 from sentential.lib.exceptions import AwsDriverError
 from sentential.lib.clients import clients
 from sentential.lib.shapes import AwsManifestList
@@ -35,6 +45,12 @@ class TestAwsEcrDriver:
     def test_get_next_major(self, aws_ecr_driver: AwsEcrDriver):
         assert "1.0.0" == aws_ecr_driver.next(True, False)
 
+    def test_next_from_tags_only(self, ecr_calls: List[str]):
+        driver = AwsEcrDriver(Ontology())
+        assert sorted(driver._tags()) == ["0.0.0", "0.0.1", "0.0.2", "0.0.3"]
+        assert driver.next() == "0.0.4"
+        assert ecr_calls == ["DescribeImages"]
+
     def test_clean(self, aws_ecr_driver: AwsEcrDriver):
         dir = os.path.expanduser("~/.docker/manifests")
         if not os.path.exists(dir):
@@ -42,3 +58,262 @@ class TestAwsEcrDriver:
         aws_ecr_driver.clean()
         with pytest.raises(AwsDriverError):
             aws_ecr_driver.get_image()
+
+
+@pytest.mark.usefixtures("moto", "init", "ontology", "mock_repo")
+class TestAwsEcrManifestCache:
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, monkeypatch: MonkeyPatch, tmp_path):
+        monkeypatch.delenv("SNTL_NO_CACHE", raising=False)
+        monkeypatch.setattr(cache, "SNTL_CACHE_DIR", str(tmp_path))
+
+    def test_unseen_only(self, ecr_calls: List[str]):
+        first = AwsEcrDriver(Ontology())._manifests()
+        assert ecr_calls.count("BatchGetImage") == 1
+
+        ecr_calls.clear()
+        second = AwsEcrDriver(Ontology())._manifests()
+        assert ecr_calls == ["DescribeImages"]
+        assert [m.dict() for m in first] == [m.dict() for m in second]
+
+    def test_tags_not_cached(self):
+        driver = AwsEcrDriver(Ontology())
+        driver._manifests()
+        image = driver.get_image("0.0.1")
+        clients.ecr.put_image(
+            repositoryName=driver.repo_name,
+            imageManifest=json.dumps(image.imageManifest.dict()),
+            imageTag="9.9.9",
+        )
+        assert AwsEcrDriver(Ontology()).get_image().imageId.imageTag == "9.9.9"
+
+    def test_chunks_of_100(self, ecr_calls: List[str]):
+        driver = AwsEcrDriver(Ontology())
+        for n in range(250):
+            manifest = generate_image_manifest(f"sha256:{n:064x}")
+            clients.ecr.put_image(
+                repositoryName=driver.repo_name,
+                imageManifest=json.dumps(manifest.dict()),
+                imageTag=f"bulk-{n}",
+            )
+        ecr_calls.clear()
+        assert len(driver._manifests()) > 250
+        assert ecr_calls.count("BatchGetImage") == 3
+
+    def test_paginated(self, monkeypatch: MonkeyPatch):
+        driver = AwsEcrDriver(Ontology())
+        pages = [
+            {
+                "imageDetails": [
+                    {"imageDigest": "sha256:a", "imageManifestMediaType": "x"}
+                ]
+            },
+            {
+                "imageDetails": [
+                    {"imageDigest": "sha256:b", "imageManifestMediaType": "x"}
+                ]
+            },
+        ]
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                return iter(pages)
+
+        monkeypatch.setattr(clients.ecr, "get_paginator", lambda name: Paginator())
+        digests = [d.imageDigest for d in driver._descriptions()]
+        assert digests == ["sha256:a", "sha256:b"]
+
+
+class TestSemVer:
+    @pytest.fixture()
+    def versions(self) -> SemVer:
+        tags = ["1.4.0", "1.4.10", "1.4.2", "1.4.2", "1.5.0-rc.1", "1.5.0-rc.2"]
+        tags += ["1.5.0", "1.4.3-beta.1", "2.0.0-rc.1", "cwi", "0.0.1-amd64", None]
+        return SemVer(tags)
+
+    def test_sorted_once(self, versions: SemVer):
+        assert versions.semver[-3:] == ["1.5.0-rc.2", "1.5.0", "2.0.0-rc.1"]
+        assert versions.index is versions.index
+        assert versions.position("1.4.10") > versions.position("1.4.2")
+        assert versions.position("cwi") == -1
+
+    def test_latest(self, versions: SemVer):
+        assert versions.latest == "1.5.0"
+        assert versions.latest_in("rc") == "2.0.0-rc.1"
+        assert SemVer([]).latest == "0.0.0"
+        assert SemVer(["1.0.0-rc.1", "0.9.0-beta.3"]).latest == "1.0.0-rc.1"
+
+    def test_range(self, versions: SemVer):
+        assert versions.range("1.4.x") == ["1.4.0", "1.4.2", "1.4.10"]
+        assert versions.range("1.x") == ["1.4.0", "1.4.2", "1.4.10", "1.5.0"]
+        assert versions.range("1.4.x", "beta") == ["1.4.3-beta.1"]
+        assert versions.range("3.x") == []
+        with pytest.raises(AwsDriverError):
+            versions.range("1.4")
+
+    def test_next_channel(self, versions: SemVer):
+        assert versions.next() == "1.5.1"
+        assert versions.next(channel="rc") == "1.5.1-rc.1"
+        assert versions.next(major=True, channel="rc") == "2.0.0-rc.2"
+
+
+@pytest.mark.usefixtures("moto", "init", "ontology", "mock_repo")
+class TestAwsEcrManifestListQuery:
+    @pytest.fixture()
+    def fetched(self, monkeypatch: MonkeyPatch):
+        driver = AwsEcrDriver(Ontology())
+        digests = []
+        fetch = driver._manifest_bodies
+
+        def record(batch: List[str]):
+            digests.extend(batch)
+            return fetch(batch)
+
+        monkeypatch.setattr(driver, "_manifest_bodies", record)
+        return driver, digests
+
+    def test_limit(self, fetched):
+        driver, digests = fetched
+        images = driver.manifest_lists(limit=2)
+        assert [i.imageId.imageTag for i in images] == ["0.0.3", "0.0.2"]
+        assert digests == [i.imageId.imageDigest for i in images]
+
+    def test_since_version(self, fetched):
+        driver, digests = fetched
+        images = driver.manifest_lists(since="0.0.2")
+        assert [i.imageId.imageTag for i in images] == ["0.0.3", "0.0.2"]
+        assert len(digests) == 2
+
+    def test_since_date(self, fetched):
+        driver, digests = fetched
+        assert len(driver.manifest_lists(since="2000-01-01")) == 4
+        assert driver.manifest_lists(since="2999-01-01") == []
+        with pytest.raises(AwsDriverError):
+            driver.manifest_lists(since="yesterday")
+
+    def test_deployed(self, fetched):
+        driver, digests = fetched
+        arch_image = clients.ecr.describe_images(
+            repositoryName=driver.repo_name, imageIds=[{"imageTag": "0.0.1-arm64"}]
+        )["imageDetails"][0]
+        images = driver.manifest_lists(deployed=arch_image["imageDigest"])
+        assert [i.imageId.imageTag for i in images] == ["0.0.1"]
+        assert driver.manifest_lists(deployed="sha256:nothing") == []
+
+
+@pytest.mark.usefixtures("moto", "init", "ontology")
+class TestAwsEcrRetention:
+    @pytest.fixture()
+    def driver(self, ontology: Ontology):
+        repo_name = ontology.context.repository_name
+        clients.ecr.create_repository(repositoryName=repo_name)
+        popluate_mock_images(repo_name)
+        yield AwsEcrDriver(Ontology())
+        clients.ecr.delete_repository(repositoryName=repo_name, force=True)
+
+    def remaining(self, driver: AwsEcrDriver) -> List[str]:
+        images = clients.ecr.describe_images(repositoryName=driver.repo_name)
+        return sorted(tag for i in images["imageDetails"] for tag in i["imageTags"])
+
+    def test_everything(self, driver: AwsEcrDriver):
+        removed = driver.clean(workers=1)
+        assert len(removed) == 12
+        assert sum(image.imageSizeInBytes or 0 for image in removed) > 0
+        assert self.remaining(driver) == []
+
+    def test_keep_last(self, driver: AwsEcrDriver):
+        assert len(driver.clean(keep_last=2, workers=1)) == 6
+        assert self.remaining(driver) == [
+            "0.0.2",
+            "0.0.2-amd64",
+            "0.0.2-arm64",
+            "0.0.3",
+            "0.0.3-amd64",
+            "0.0.3-arm64",
+        ]
+
+    def test_keep_deployed(self, driver: AwsEcrDriver):
+        arch_image = clients.ecr.describe_images(
+            repositoryName=driver.repo_name, imageIds=[{"imageTag": "0.0.1-amd64"}]
+        )["imageDetails"][0]
+        deployed = arch_image["imageDigest"].split(":")[1]  # as lambda reports it
+        assert len(driver.clean(deployed=deployed, workers=1)) == 9
+        assert self.remaining(driver) == ["0.0.1", "0.0.1-amd64", "0.0.1-arm64"]
+
+    def test_older_than(self, driver: AwsEcrDriver):
+        assert driver.clean(older_than=1, workers=1) == []
+        assert len(self.remaining(driver)) == 12
+
+    def test_evicts_cached_manifests(
+        self, driver: AwsEcrDriver, monkeypatch: MonkeyPatch, tmp_path
+    ):
+        monkeypatch.delenv("SNTL_NO_CACHE", raising=False)
+        monkeypatch.setattr(cache, "SNTL_CACHE_DIR", str(tmp_path))
+        cached = lambda: len(list(tmp_path.joinpath("manifests").iterdir()))
+        driver._manifests()
+        assert cached() == 12
+
+        # an entry past its ttl, e.g. for an image deleted outside sntl
+        driver._manifest_cache.put("elsewhere@sha256:gone", "{}")
+        stale = driver._manifest_cache._path("elsewhere@sha256:gone")
+        os.utime(stale, (0, 0))
+        assert len(driver.clean(keep_last=2, workers=1)) == 6
+        assert cached() == 6
+        assert not stale.exists()
+
+    def test_chunks_of_100(self, driver: AwsEcrDriver, monkeypatch: MonkeyPatch):
+        chunks = []
+
+        def batch_delete_image(repositoryName, imageIds):
+            chunks.append(len(imageIds))
+            return {"imageIds": imageIds, "failures": []}
+
+        monkeypatch.setattr(clients.ecr, "batch_delete_image", batch_delete_image)
+        digests = [f"sha256:{n:064x}" for n in range(250)]
+        assert driver._delete(digests, workers=4) == []
+        assert sorted(chunks) == [50, 100, 100]
+
+    def test_already_deleted(self, driver: AwsEcrDriver):
+        digests = [d.imageDigest for d in driver._descriptions()]
+        assert driver._delete([f"sha256:{'f' * 64}"], workers=1) == []
+        assert len(driver.clean(workers=1)) == 12
+        assert driver._delete(digests, workers=1) == []
+
+    def test_other_failures_raise(self, driver: AwsEcrDriver, monkeypatch: MonkeyPatch):
+        def batch_delete_image(repositoryName, imageIds):
+            failure = {
+                "imageId": imageIds[0],
+                "failureCode": "ImageReferencedByManifestList",
+                "failureReason": "Requested image referenced by a manifest list",
+            }
+            return {"imageIds": [], "failures": [failure]}
+
+        monkeypatch.setattr(clients.ecr, "batch_delete_image", batch_delete_image)
+        with pytest.raises(AwsDriverError):
+            driver.clean(workers=1)
+
+
+@pytest.mark.usefixtures("moto", "init", "ontology")
+class TestAwsEcrPrereleasesOnly:
+    @pytest.fixture()
+    def driver(self, ontology: Ontology):
+        repo_name = ontology.context.repository_name
+        clients.ecr.create_repository(repositoryName=repo_name)
+        for n, tag in enumerate(["1.0.0-rc.1", "1.0.0-rc.2"]):
+            manifest_list = AwsManifestList(
+                manifests=[generate_manifest_list_manifest(f"sha256:{n:064x}", 1024)]
+            ).json()
+            clients.ecr.put_image(
+                repositoryName=repo_name,
+                imageManifest=manifest_list,
+                imageDigest=content_digest(manifest_list),
+                imageTag=tag,
+            )
+        yield AwsEcrDriver(Ontology())
+        clients.ecr.delete_repository(repositoryName=repo_name, force=True)
+
+    def test_get_image_implicit(self, driver: AwsEcrDriver):
+        assert driver.get_image().imageId.imageTag == "1.0.0-rc.2"
+
+    def test_next_releases_prerelease(self, driver: AwsEcrDriver):
+        assert driver.next() == "1.0.0"
@@ -0,0 +1,83 @@
+import os
+import json
+import boto3
+import pytest
+from pytest import MonkeyPatch
+from threading import Thread
+from typing import List
+from sentential.lib import cache
+from sentential.lib.clients import clients
+from sentential.lib.ontology import Ontology
+from sentential.lib.parameter_server import server
+from sentential.lib.drivers.local_parameter_cache import LocalParameterCache
+
+
+@pytest.fixture()
+def served():
+    ontology = Ontology()
+    ontology.envs.set("ENVVAR", "present")
+    ontology.secrets.set("SECRET", "present")
+    snapshot = LocalParameterCache(Ontology()).snapshot()
+
+    httpd = server(snapshot, 0, "127.0.0.1")
+    Thread(target=httpd.serve_forever, daemon=True).start()
+    yield ontology, clients.client(
+        "ssm", endpoint_url=f"http://127.0.0.1:{httpd.server_address[1]}"
+    )
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestLocalParameterCache:
+    def test_snapshot_batched_read(self, ssm_calls: List[str]):
+        ontology = Ontology()
+        ontology.context.account_id
+        ssm_calls.clear()
+        snapshot = LocalParameterCache(ontology).snapshot()
+        assert ssm_calls == ["GetParameters", "GetParameters"]
+        assert set(snapshot) == {str(ontology.envs.path), str(ontology.secrets.path)}
+
+    def test_get_parameters(self, served):
+        ontology, ssm = served
+        names = [str(ontology.envs.path), str(ontology.secrets.path), "/missing"]
+        resp = ssm.get_parameters(Names=names, WithDecryption=True)
+        values = {p["Name"]: json.loads(p["Value"]) for p in resp["Parameters"]}
+        assert values == {
+            str(ontology.envs.path): {"ENVVAR": "present"},
+            str(ontology.secrets.path): {"SECRET": "present"},
+        }
+        assert resp["InvalidParameters"] == ["/missing"]
+
+    def test_get_parameter(self, served):
+        ontology, ssm = served
+        resp = ssm.get_parameter(Name=str(ontology.secrets.path), WithDecryption=True)
+        assert json.loads(resp["Parameter"]["Value"]) == {"SECRET": "present"}
+        with pytest.raises(ssm.exceptions.ParameterNotFound):
+            ssm.get_parameter(Name="/missing")
+
+    def test_matches_ssm(self, served):
+        ontology, ssm = served
+        names = [str(ontology.envs.path), str(ontology.secrets.path)]
+        shape = lambda resp: {p["Name"]: (p["Type"], p["Value"]) for p in resp}
+        local = ssm.get_parameters(Names=names, WithDecryption=True)
+        remote = clients.ssm.get_parameters(Names=names, WithDecryption=True)
+        assert shape(local["Parameters"]) == shape(remote["Parameters"])
+
+    def test_endpoint_env_honoured(self, served, monkeypatch: MonkeyPatch):
+        # what the entry wrapper's sdk sees inside the container
+        ontology, ssm = served
+        monkeypatch.setenv("AWS_ENDPOINT_URL_SSM", ssm.meta.endpoint_url)
+        sdk = boto3.Session().client("ssm", region_name="us-west-2")
+        resp = sdk.get_parameter(Name=str(ontology.envs.path), WithDecryption=True)
+        assert json.loads(resp["Parameter"]["Value"]) == {"ENVVAR": "present"}
+
+    def test_snapshot_removed_on_stop(self, monkeypatch: MonkeyPatch, tmp_path):
+        monkeypatch.setattr(cache, "SNTL_CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(clients.docker, "run", lambda *args, **kwargs: None)
+        monkeypatch.setattr(clients.docker, "remove", lambda *args, **kwargs: None)
+        parameters = LocalParameterCache(Ontology())
+        parameters.start()
+        assert os.stat(parameters.snapshot_file).st_mode & 0o777 == 0o600
+        parameters.stop()
+        assert not parameters.snapshot_file.exists()
@@ -0,0 +1,126 @@
+import os
+import pytest
+from types import SimpleNamespace
+from typing import List
+from pytest import MonkeyPatch
+from sentential.lib import backends
+from sentential.lib.backends import (
+    LocalBackend,
+    SsmBackend,
+    StoreBackend,
+    store_backend,
+)
+from sentential.lib.clients import clients
+from sentential.lib.drivers.local_bridge import LocalBridge
+from sentential.lib.drivers.local_lambda import LocalLambdaDriver
+from sentential.lib.exceptions import AwsDriverError, StoreError
+from sentential.lib.mounts.aws_event_schedule import AwsEventScheduleMount
+from sentential.lib.ontology import Ontology
+from sentential.lib.shapes import StoreBackendName
+from helpers import table_body
+
+
+@pytest.fixture()
+def local(monkeypatch: MonkeyPatch, tmp_path):
+    monkeypatch.setattr(backends, "SNTL_STORE_DB", str(tmp_path / "stores.db"))
+    monkeypatch.setenv("SNTL_STORE_BACKEND", "local")
+
+
+class TestLocalBackend:
+    def test_missing(self, tmp_path):
+        backend = LocalBackend(str(tmp_path / "stores.db"))
+        assert backend.get({"/a": False, "/b": True}) == {"/a": ({}, 0), "/b": ({}, 0)}
+
+    def test_versions(self, tmp_path):
+        backend = LocalBackend(str(tmp_path / "stores.db"))
+        assert backend.put("/a", '{"k": 1}', False) == 1
+        assert backend.put("/a", '{"k": 2}', False) == 2
+        assert backend.get({"/a": False}) == {"/a": ({"k": 2}, 2)}
+        backend.delete("/a")
+        assert backend.get({"/a": False}) == {"/a": ({}, 0)}
+
+    def test_owner_only(self, tmp_path):
+        backend = LocalBackend(str(tmp_path / "nested" / "stores.db"))
+        backend.put("/a", "{}", True)
+        assert os.stat(backend.db).st_mode & 0o777 == 0o600
+
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            StoreBackend()
+
+    def test_selection(self, monkeypatch: MonkeyPatch):
+        context = Ontology().context
+        assert isinstance(store_backend(context), SsmBackend)
+        monkeypatch.setenv("SNTL_STORE_BACKEND", "local")
+        assert isinstance(store_backend(context), LocalBackend)
+        assert isinstance(store_backend(context, "ssm"), SsmBackend)
+        with pytest.raises(StoreError):
+            store_backend(context, "nope")
+
+
+@pytest.mark.usefixtures("moto", "init", "local")
+class TestLocalStore:
+    def test_store_ops_offline(self, ssm_calls: List[str]):
+        ontology = Ontology()
+        ontology.envs.set("key", "value")
+        ontology.secrets.set("secret", "value")
+        assert Ontology().envs.state == {"key": "value"}
+        assert table_body(Ontology().envs.rm("key")) == []
+        ontology.export_store_defaults()
+        ontology.clear_stores()
+        assert ssm_calls == []
+
+    def test_push_pull(self, invoke, ssm_calls: List[str]):
+        ontology = Ontology()
+        ontology.envs.set("key", "value")
+        ontology.secrets.set("secret", "value")
+
+        result = invoke(["secrets", "push", "--all"])
+        assert result.exit_code == 0
+        assert "2 of 5 stores written" in result.stdout
+        assert ssm_calls.count("GetParameters") == 2  # plain stores, then secrets
+
+        ssm = Ontology()
+        ssm.backend = store_backend(ssm.context, "ssm")
+        assert ssm.envs.state == {"key": "value"}
+        assert ssm.secrets.state == {"secret": "value"}
+
+        # unchanged stores are not written again
+        assert "0 of 5 stores written" in invoke(["envs", "push", "--all"]).stdout
+
+        ssm.envs.set("key", "remote")
+        ontology.envs.clear()
+        assert "1 of 1 stores written" in invoke(["envs", "pull"]).stdout
+        assert Ontology().envs.state == {"key": "remote"}
+
+    def test_deploy_local_injects_stores(self, monkeypatch: MonkeyPatch):
+        runs = []
+        monkeypatch.setattr(LocalBridge, "setup", lambda: None)
+        monkeypatch.setattr(clients.docker, "remove", lambda *args, **kwargs: None)
+        monkeypatch.setattr(clients.docker, "run", lambda *a, **kw: runs.append(kw))
+        ontology = Ontology()
+        ontology.envs.set("count", "3")
+        ontology.secrets.set("secret", "value")
+        LocalLambdaDriver(ontology).deploy(SimpleNamespace(id="image"))
+        [envs] = [run["envs"] for run in runs]
+        assert envs["count"] == "3"
+        assert envs["secret"] == "value"
+        assert "SSM_PATHS" not in envs
+        assert "AWS_ENDPOINT_URL_SSM" not in envs
+
+    def test_deploy_aws_refused(self, invoke, mock_repo, ssm_calls: List[str]):
+        with pytest.raises(AwsDriverError, match="sntl envs push --all"):
+            invoke(["deploy", "aws"])
+        assert ssm_calls == []
+
+    def test_destroy_aws_uses_ssm(self, invoke, monkeypatch: MonkeyPatch):
+        backends = []
+        umount = AwsEventScheduleMount.umount
+
+        def recording(self):
+            backends.append(self.ontology.backend.name)
+            return umount(self)
+
+        monkeypatch.setattr(AwsEventScheduleMount, "umount", recording)
+        assert invoke(["destroy", "aws"]).exit_code == 0
+        assert backends == [StoreBackendName.ssm]
@@ -0,0 +1,36 @@
+import pytest
+from sentential.lib.clients import Clients, SERVICES, boto3_config
+
+
+class TestClients:
+    def test_no_clients_on_init(self):
+        registry = Clients()
+        assert not any(name in registry.__dict__ for name in SERVICES)
+        assert "session" not in registry.__dict__
+
+    def test_client_built_on_first_access(self):
+        registry = Clients()
+        ssm = registry.ssm
+        assert ssm.meta.service_model.service_name == "ssm"
+        assert registry.ssm is ssm
+        assert [name for name in SERVICES if name in registry.__dict__] == ["ssm"]
+
+    def test_clients_share_session(self):
+        registry = Clients()
+        registry.sts
+        session = registry.session
+        registry.lmb
+        assert registry.session is session
+
+    def test_test_endpoint_override(self):
+        registry = Clients("test")
+        assert registry.lmb.meta.endpoint_url == boto3_config["test"]["endpoint_url"]
+
+    def test_explicit_endpoint_wins(self):
+        registry = Clients("test")
+        local = registry.client("lambda", endpoint_url="http://localhost:9000")
+        assert local.meta.endpoint_url == "http://localhost:9000"
+
+    def test_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            Clients().not_a_service
@@ -0,0 +1,72 @@
+import os
+import pytest
+from pathlib import PosixPath
+from sentential.lib import dockerfile
+from sentential.lib.dockerfile import load_dockerfile
+
+SENTENTIAL = """
+FROM --platform=linux/amd64 public.ecr.aws/lambda/python:3.10 AS runtime
+ENV AWS_LAMBDA_EXEC_WRAPPER=/bin/wrapper.sh
+COPY --chmod=755 --from=ghcr.io/linecard/entry:0.4.2 / /bin/
+
+# comment FROM runtime AS not_this
+FROM runtime as kaixo
+COPY ./src/ ${LAMBDA_TASK_ROOT}
+RUN pip install \\
+    requests
+"""
+
+ENTRY_STAGE = """
+FROM ghcr.io/linecard/entry:0.4.1 as entry
+FROM public.ecr.aws/lambda/python:latest AS runtime
+COPY --chmod=755 --from=entry / /bin/
+
+FROM runtime AS kaixo
+"""
+
+
+@pytest.fixture()
+def write(tmp_path: PosixPath):
+    def writer(content: str) -> PosixPath:
+        path = tmp_path.joinpath("Dockerfile")
+        path.write_text(content)
+        return path
+
+    return writer
+
+
+class TestDockerfile:
+    def test_parse(self, write):
+        parsed = load_dockerfile(write(SENTENTIAL))
+        assert parsed.stage_names == ["runtime", "kaixo"]
+        assert parsed.base_images == ["public.ecr.aws/lambda/python:3.10"]
+        assert parsed.stages[0].platform == "linux/amd64"
+        assert parsed.repository_name == "kaixo"
+        assert parsed.entry_version == "0.4.2"
+
+    def test_entry_as_stage(self, write):
+        parsed = load_dockerfile(write(ENTRY_STAGE))
+        assert parsed.entry_version == "0.4.1"
+        assert parsed.repository_name == "kaixo"
+
+    def test_not_sentential(self, write):
+        parsed = load_dockerfile(write("FROM ubuntu\n"))
+        assert parsed.repository_name is None
+        assert parsed.entry_version is None
+
+    def test_read_once(self, write, monkeypatch: pytest.MonkeyPatch):
+        path = write(SENTENTIAL)
+        first = load_dockerfile(path)
+        monkeypatch.setattr(dockerfile, "open", lambda *a: pytest.fail(), raising=False)
+        assert load_dockerfile(path) is first
+
+    def test_reparse_on_change(self, write):
+        path = write(SENTENTIAL)
+        load_dockerfile(path)
+        write(ENTRY_STAGE)
+        os.utime(path, ns=(0, 0))
+        assert load_dockerfile(path).entry_version == "0.4.1"
+
+    def test_missing(self, tmp_path: PosixPath):
+        with pytest.raises(FileNotFoundError):
+            load_dockerfile(tmp_path.joinpath("Dockerfile"))
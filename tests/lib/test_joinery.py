@@ -0,0 +1,100 @@
+import pytest
+from threading import Barrier
+from time import sleep
+from typing import List, Optional
+from pytest import MonkeyPatch
+from sentential.lib.clients import clients
+from sentential.lib.exceptions import JoineryError
+from sentential.lib.ontology import Ontology
+from sentential.lib.joinery import Joinery
+
+RESULTS = {
+    "_local_image": None,
+    "_containers": [],
+    "_gateway_running": False,
+    "_deployed_function": None,
+    "_deployed_url": None,
+    "_deployed_schedule": None,
+    "_deployed_routes": [],
+    "_manifest_lists": [],
+}
+
+
+def stub(
+    joinery: Joinery, monkeypatch: MonkeyPatch, barrier: Optional[Barrier] = None
+) -> List[str]:
+    calls = []
+
+    def lookup(name, result):
+        def call():
+            if barrier:
+                barrier.wait()  # only returns once every lookup is in flight at once
+            calls.append(name)
+            return result
+
+        return call
+
+    for name, result in RESULTS.items():
+        monkeypatch.setattr(joinery, name, lookup(name, result))
+    return calls
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestJoineryFanOut:
+    def test_lookups_concurrent(self, monkeypatch: MonkeyPatch):
+        joinery = Joinery(Ontology())
+        calls = stub(joinery, monkeypatch, Barrier(len(joinery.sources), timeout=10))
+        joinery._gather()
+        assert len(calls) == len(joinery.sources)
+
+    def test_timings(self, monkeypatch: MonkeyPatch):
+        joinery = Joinery(Ontology())
+        stub(joinery, monkeypatch)
+        joinery._gather()
+        assert set(joinery.timings) == set(joinery.sources)
+        assert all(seconds >= 0 for seconds in joinery.timings.values())
+        assert len(joinery.timing().rows) == len(joinery.sources)
+
+    def test_failed_lookup_raised_by_caller(self, monkeypatch: MonkeyPatch):
+        joinery = Joinery(Ontology())
+        stub(joinery, monkeypatch)
+
+        def boom():
+            raise ValueError("boom")
+
+        monkeypatch.setattr(joinery, "_deployed_routes", boom)
+        joinery._gather()
+        assert "api gateway routes" in joinery.timings
+        with pytest.raises(ValueError):
+            joinery._deployed_routes()
+
+    def test_sntl_exception_raised_by_caller(self, monkeypatch: MonkeyPatch):
+        joinery = Joinery(Ontology())
+        stub(joinery, monkeypatch)
+
+        def boom():
+            raise JoineryError("boom")
+
+        monkeypatch.setattr(joinery, "_deployed_routes", boom)
+        joinery._gather()
+        assert "api gateway routes" in joinery.timings
+        with pytest.raises(JoineryError):
+            joinery._deployed_routes()
+
+    def test_deployed_only_looks_up_function_once(self, monkeypatch: MonkeyPatch):
+        joinery = Joinery(Ontology(), deployed_only=True)
+        stub(joinery, monkeypatch)
+        # the real lookups, manifests depend on the function
+        monkeypatch.delattr(joinery, "_deployed_function")
+        monkeypatch.delattr(joinery, "_manifest_lists")
+        calls = []
+
+        def get_function(**kwargs):
+            calls.append(kwargs["FunctionName"])
+            sleep(0.1)  # long enough for a racing lookup to start its own call
+            raise clients.lmb.exceptions.ResourceNotFoundException({}, "GetFunction")
+
+        monkeypatch.setattr(clients.lmb, "get_function", get_function)
+        joinery._gather()
+        assert joinery._manifest_lists() == []
+        assert len(calls) == 1
@@ -1,15 +1,27 @@
+import gc
 import os
+import json
+import weakref
+from datetime import datetime
 from pathlib import PosixPath
 import pytest
 import re
+import boto3
+from botocore.exceptions import ClientError
+from typing import List
+from pytest import MonkeyPatch
 from os import environ, remove
 from shutil import copyfile
 from helpers import table_headers, table_body, rewrite
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
+from sentential.lib import cache
 from sentential.lib.clients import clients
-from sentential.lib.ontology import Ontology
-from sentential.lib.shapes import AWSCallerIdentity, Paths
-from sentential.lib.exceptions import ContextError, ValidationError
+from sentential.lib.ontology import Ontology, load_user_defined_shapes
+from sentential.lib.template import Policy
+from sentential.lib.drivers.aws_lambda import AwsLambdaDriver
+from sentential.lib.mounts.aws_event_schedule import AwsEventScheduleMount
+from sentential.lib.shapes import AWSCallerIdentity, Paths, Args, Envs, StoreModel
+from sentential.lib.exceptions import ContextError, StoreError, ValidationError
 
 # We should figure out how to clear these for all tests...
 if "PARTITION" in environ:
@@ -259,3 +271,434 @@ class TestStoreGlobalOps:
         assert not self.parameter_exists(ontology.secrets.path)
         assert not self.parameter_exists(ontology.tags.path)
         assert not self.parameter_exists(ontology.configs.path)
+
+
+@pytest.fixture()
+def sts_calls(record_calls):
+    return record_calls("sts", operation="GetCallerIdentity")
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestContextSnapshot:
+    def test_context_shared(self):
+        ontology = Ontology()
+        assert ontology.context is ontology.context
+
+    def test_sts_called_once_per_command(self, sts_calls: List[str]):
+        ontology = Ontology()
+        ontology.export_store_defaults()
+        AwsLambdaDriver(ontology)
+        AwsEventScheduleMount(ontology)
+        Policy(ontology).render()
+        ontology.context.dict()
+        assert len(sts_calls) == 1
+
+    def test_kms_key_id_per_instance(self, record_calls):
+        calls = record_calls("kms", operation="DescribeKey")
+        context = Ontology().context
+        assert context.kms_key_id == context.kms_key_id
+        assert len(calls) == 1
+        context = weakref.ref(context)
+        gc.collect()
+        assert context() is None
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestContextCache:
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, monkeypatch: MonkeyPatch, tmp_path):
+        monkeypatch.delenv("SNTL_NO_CACHE", raising=False)
+        monkeypatch.setattr(cache, "SNTL_CACHE_DIR", str(tmp_path))
+
+    def test_warm_run_skips_sts(self, sts_calls: List[str]):
+        cold = Ontology().context
+        warm = Ontology().context
+        assert warm.account_id == cold.account_id
+        assert warm.partition == cold.partition
+        assert len(sts_calls) == 1
+
+    def test_warm_run_skips_kms(self, record_calls):
+        key_id = Ontology().context.kms_key_id
+        calls = record_calls("kms", operation="ListAliases")
+        assert Ontology().context.kms_key_id == key_id
+        assert len(calls) == 0
+
+    def test_no_cache(self, sts_calls: List[str], monkeypatch: MonkeyPatch):
+        Ontology().context.account_id
+        monkeypatch.setenv("SNTL_NO_CACHE", "true")
+        Ontology().context.account_id
+        assert len(sts_calls) == 2
+
+    def test_fingerprint_follows_credentials(self, monkeypatch: MonkeyPatch):
+        before = Ontology().context._fingerprint
+        other = boto3.Session(
+            aws_access_key_id="other",
+            aws_secret_access_key="other",
+            region_name="us-west-2",
+        )
+        monkeypatch.setattr(clients, "session", other)
+        assert Ontology().context._fingerprint != before
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestKmsKeyResolution:
+    @pytest.fixture()
+    def kms_calls(self, record_calls):
+        return record_calls("kms")
+
+    def test_exact_alias(self, kms_calls: List[str]):
+        key_id = Ontology().context.kms_key_id
+        assert re.match(r"^.{8}-.{4}-.{4}-.{4}-.{12}", key_id)
+        assert kms_calls == ["DescribeKey"]
+
+    def test_prefixed_alias(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setenv("AWS_KMS_KEY_ALIAS", "alias/aws/ssm")
+        prefixed = Ontology().context.kms_key_id
+        monkeypatch.delenv("AWS_KMS_KEY_ALIAS")
+        assert Ontology().context.kms_key_id == prefixed
+
+    def test_partial_alias_does_not_match(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setenv("AWS_KMS_KEY_ALIAS", "ssm")
+        with pytest.raises(ContextError):
+            Ontology().context.kms_key_id
+
+    def test_fallback_scan(self, monkeypatch: MonkeyPatch):
+        expected = Ontology().context.kms_key_id
+
+        def denied(**kwargs):
+            raise ClientError(
+                {"Error": {"Code": "AccessDeniedException"}}, "DescribeKey"
+            )
+
+        monkeypatch.setattr(clients.kms, "describe_key", denied)
+        assert Ontology().context.kms_key_id == expected
+
+    def test_unencrypted_stores_skip_kms(self, kms_calls: List[str]):
+        ontology = Ontology()
+        for store in [ontology.args, ontology.envs, ontology.tags, ontology.configs]:
+            store.export_defaults()
+        assert kms_calls == []
+        ontology.secrets.export_defaults()
+        assert kms_calls == ["DescribeKey"]
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestLazyStore:
+    @pytest.fixture()
+    def aws_calls(self, record_calls):
+        return record_calls("sts", "kms", "ssm")
+
+    def test_construction_is_free(self, aws_calls: List[str]):
+        ontology = Ontology()
+        stores = [
+            ontology.args,
+            ontology.envs,
+            ontology.secrets,
+            ontology.tags,
+            ontology.configs,
+        ]
+        assert len(stores) == 5
+        assert aws_calls == []
+
+        ontology.configs.state
+        assert aws_calls == ["GetCallerIdentity", "GetParameters"]
+
+    def test_stores_shared(self):
+        ontology = Ontology()
+        assert ontology.configs is ontology.configs
+        assert ontology.configs.context is ontology.envs.context
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestBatchedStoreFetch:
+    def test_single_fetch(self, ssm_calls: List[str]):
+        Ontology().envs.set("key", "value")
+        Ontology().secrets.set("secret", "value")
+
+        ontology = Ontology()
+        ssm_calls.clear()
+        assert ontology.envs.state == {"key": "value"}
+        assert ontology.secrets.state == {"secret": "value"}
+        assert ontology.args.state == {}
+        ontology.tags.parameters
+        ontology.configs.parameters
+        assert ssm_calls == ["GetParameters", "GetParameter"]
+
+    def test_plain_stores_skip_decryption(self, monkeypatch: MonkeyPatch):
+        Ontology().secrets.set("secret", "value")
+        requested = []
+        get_parameters = clients.ssm.get_parameters
+
+        def recording(**kwargs):
+            requested.append((len(kwargs["Names"]), kwargs["WithDecryption"]))
+            return get_parameters(**kwargs)
+
+        monkeypatch.setattr(clients.ssm, "get_parameters", recording)
+        ontology = Ontology()
+        ontology.envs.state
+        ontology.configs.state
+        assert requested == [(4, False)]
+
+        paths = {str(ontology.envs.path): False, str(ontology.secrets.path): True}
+        ontology.backend.get(paths)
+        assert requested[1:] == [(1, False), (1, True)]
+
+    def test_write_drops_prefetched_state(self):
+        ontology = Ontology()
+        ontology.envs.state
+        Ontology().envs.set("key", "other")
+        ontology.envs.set("second", "value")
+        assert ontology.envs.state == {"key": "other", "second": "value"}
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestStoreStateCache:
+    @pytest.fixture(autouse=True)
+    def clean(self):
+        Ontology().clear_stores()
+
+    def test_set_reads_once(self, ssm_calls: List[str]):
+        ontology = Ontology()
+        ontology.envs.set("key", "value")
+        ontology.envs.set("other", "value")
+        assert ontology.envs.parameters.dict() == {"key": "value", "other": "value"}
+        assert ssm_calls == [
+            "GetParameter",
+            "PutParameter",
+            "GetParameter",
+            "PutParameter",
+        ]
+
+    def test_concurrent_write_invalidates(self, ssm_calls: List[str]):
+        ontology = Ontology()
+        ontology.envs.set("key", "value")
+        store = ontology.envs
+        version = store._version
+        Ontology().envs.set("key", "other")
+        ssm_calls.clear()
+        store._write_parameters(store.state)  # writes the stale copy, version skips one
+        assert ssm_calls == ["PutParameter", "GetParameters"]
+        assert store.state == {"key": "value"}
+        assert store._version == version + 2
+
+    def test_clear(self, ssm_calls: List[str]):
+        ontology = Ontology()
+        ontology.envs.set("key", "value")
+        ssm_calls.clear()
+        ontology.envs.clear()
+        assert ontology.envs.state == {}
+        assert ssm_calls == ["DeleteParameter"]
+
+    def test_export_skips_unchanged(self, ssm_calls: List[str]):
+        assert Ontology().export_store_defaults() == 0
+        ontology = Ontology()
+        ssm_calls.clear()
+        assert ontology.export_store_defaults() == 5
+        assert ssm_calls == ["GetParameters", "GetParameter"]
+
+    def test_export_writes_changed(self, ssm_calls: List[str]):
+        Ontology().export_store_defaults()
+        path = str(Ontology().configs.path)
+        clients.ssm.put_parameter(Name=path, Value="{}", Type="String", Overwrite=True)
+        ssm_calls.clear()
+        assert Ontology().export_store_defaults() == 4
+        assert ssm_calls == ["GetParameters", "GetParameter", "PutParameter"]
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestStoreTiers:
+    def tier(self, ontology: Ontology) -> str:
+        resp = clients.ssm.describe_parameters(
+            ParameterFilters=[{"Key": "Name", "Values": [str(ontology.envs.path)]}]
+        )
+        return resp["Parameters"][0]["Tier"]
+
+    def test_standard(self):
+        ontology = Ontology()
+        ontology.envs.set("small", "x" * 1024)
+        assert self.tier(ontology) == "Standard"
+
+    def test_promoted_to_advanced(self):
+        ontology = Ontology()
+        ontology.envs.set("large", "x" * 6144)
+        assert self.tier(ontology) == "Advanced"
+        assert ontology.envs.state["large"] == "x" * 6144
+
+    def test_over_limit(self):
+        ontology = Ontology()
+        with pytest.raises(StoreError):
+            ontology.envs.set("huge", "x" * 9000)
+        assert "huge" not in ontology.envs.state
+
+    def test_advanced_not_downgraded(self, monkeypatch: MonkeyPatch):
+        ontology = Ontology()
+        ontology.envs.set("large", "x" * 6144)
+        put_parameter = clients.ssm.put_parameter
+        tiers = []
+
+        def advanced_only(**params):
+            # what ssm does once a parameter is advanced
+            tiers.append(params["Tier"])
+            if params["Tier"] == "Standard":
+                raise ClientError(
+                    {
+                        "Error": {
+                            "Code": "ValidationException",
+                            "Message": "You can't downgrade a parameter from the advanced-parameter tier",
+                        }
+                    },
+                    "PutParameter",
+                )
+            return put_parameter(**params)
+
+        monkeypatch.setattr(clients.ssm, "put_parameter", advanced_only)
+        ontology.envs.rm("large")
+        assert tiers == ["Standard", "Advanced"]
+        assert "large" not in ontology.envs.state
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestLambdaEnvironment:
+    @pytest.fixture(autouse=True)
+    def clean(self):
+        Ontology().clear_stores()
+
+    def test_ssm_paths(self):
+        ontology = Ontology()
+        paths = f"{ontology.envs.path},{ontology.secrets.path}"
+        assert ontology.lambda_environment() == {"SSM_PATHS": paths}
+
+    def test_baked(self):
+        ontology = Ontology()
+        ontology.envs.merge({"NAME": "value", "COUNT": 3, "LIST": ["a"]})
+        assert ontology.lambda_environment(bake_envs=True) == {
+            "SSM_PATHS": str(ontology.secrets.path),
+            "NAME": "value",
+            "COUNT": "3",
+            "LIST": '["a"]',
+        }
+
+    def test_baked_typed(self, monkeypatch: MonkeyPatch):
+        class Window(BaseModel):
+            start: int
+            end: int
+
+        class TypedEnvs(StoreModel):
+            WHEN: datetime
+            WINDOW: Window
+
+        ontology = Ontology()
+        monkeypatch.setattr(ontology.envs, "model", TypedEnvs)
+        ontology.envs.merge(
+            {"WHEN": "2024-01-02T03:04:05", "WINDOW": {"start": 1, "end": 2}}
+        )
+        environment = ontology.lambda_environment(bake_envs=True)
+        assert environment["WHEN"] == "2024-01-02T03:04:05"
+        assert json.loads(environment["WINDOW"]) == {"start": 1, "end": 2}
+
+    @pytest.mark.parametrize(
+        "envs",
+        [{"BIG": "x" * 4096}, {"AWS_REGION": "us-west-2"}, {"SSM_PATHS": "/x"}],
+    )
+    def test_fallback(self, envs):
+        ontology = Ontology()
+        ontology.envs.merge(envs)
+        paths = f"{ontology.envs.path},{ontology.secrets.path}"
+        assert ontology.lambda_environment(bake_envs=True) == {"SSM_PATHS": paths}
+
+
+@pytest.mark.usefixtures("moto", "init")
+class TestPartitionSync:
+    def envs(self, monkeypatch: MonkeyPatch, partition: str):
+        monkeypatch.setenv("PARTITION", partition)
+        return Ontology().envs
+
+    @pytest.fixture(autouse=True)
+    def partitions(self, monkeypatch: MonkeyPatch):
+        for partition in ["dev1", "dev2", "dev3"]:
+            self.envs(monkeypatch, partition).clear()
+        self.envs(monkeypatch, "lead").merge({"shared": "value", "own": "lead"})
+        self.envs(monkeypatch, "dev1").merge({"own": "dev1"})
+        self.envs(monkeypatch, "dev2").merge({"own": "dev2"})
+        monkeypatch.delenv("PARTITION")
+
+    def test_scan_reads_only_matches(self, ssm_calls: List[str]):
+        clients.ssm.put_parameter(Name="/elsewhere", Value="{}", Type="String")
+        envs = Ontology().envs
+        envs.context.account_id
+        ssm_calls.clear()
+        found = envs.backend.scan(f"/{envs.repo}/Envs", False)
+        assert sorted(path.split("/")[1] for path in found) == ["dev1", "dev2", "lead"]
+        assert "GetParametersByPath" not in ssm_calls
+        assert ssm_calls == ["DescribeParameters", "GetParameters"]
+
+    def test_copy_to_all(self, monkeypatch: MonkeyPatch):
+        table = table_body(Ontology().envs.sync("lead", ["all"]))
+        assert [row[0] for row in table] == ["dev1", "dev2"]
+        assert all(row[1].startswith("written") for row in table)
+        expected = {"shared": "value", "own": "lead"}
+        assert self.envs(monkeypatch, "dev1").state == expected
+        assert self.envs(monkeypatch, "dev2").state == expected
+
+    def test_key_merged(self, monkeypatch: MonkeyPatch):
+        Ontology().envs.sync("lead", ["dev1", "dev3"], keys=["shared"], workers=2)
+        assert self.envs(monkeypatch, "dev1").state == {
+            "shared": "value",
+            "own": "dev1",
+        }
+        assert self.envs(monkeypatch, "dev3").state == {"shared": "value"}
+
+    def test_unchanged_skipped(self):
+        Ontology().envs.sync("lead", ["dev1"], merge=True)
+        table = table_body(Ontology().envs.sync("lead", ["dev1"], merge=True))
+        assert table == [["dev1", "unchanged"]]
+
+    def test_missing_source(self):
+        with pytest.raises(StoreError):
+            Ontology().envs.sync("nobody", ["dev1"])
+
+    def test_cli(self, invoke, monkeypatch: MonkeyPatch):
+        result = invoke(["envs", "sync", "--from", "lead", "--to", "dev1,dev2"])
+        assert result.exit_code == 0
+        assert "dev1" in result.stdout and "dev2" in result.stdout
+        assert self.envs(monkeypatch, "dev2").state["shared"] == "value"
+
+
+class TestUserDefinedShapes:
+    SHAPES = "\n".join(
+        [
+            "from sentential.lib.shapes import StoreModel",
+            "class Envs(StoreModel):",
+            "    {field}: int = 1",
+        ]
+    )
+
+    @pytest.fixture(autouse=True)
+    def workdir(self, monkeypatch: MonkeyPatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    def test_no_shapes(self):
+        assert load_user_defined_shapes()["Envs"] is Envs
+
+    def test_loaded_once(self, workdir):
+        workdir.joinpath("shapes.py").write_text(self.SHAPES.format(field="one"))
+        models = load_user_defined_shapes()
+        assert "one" in models["Envs"].__fields__
+        assert models["Args"] is Args
+        assert load_user_defined_shapes()["Envs"] is models["Envs"]
+
+    def test_unchanged_content_not_reloaded(self, workdir):
+        shapes = workdir.joinpath("shapes.py")
+        shapes.write_text(self.SHAPES.format(field="one"))
+        envs = load_user_defined_shapes()["Envs"]
+        os.utime(shapes, ns=(0, 0))
+        assert load_user_defined_shapes()["Envs"] is envs
+
+    def test_changed_content_reloaded(self, workdir):
+        shapes = workdir.joinpath("shapes.py")
+        shapes.write_text(self.SHAPES.format(field="one"))
+        load_user_defined_shapes()
+        shapes.write_text(self.SHAPES.format(field="two"))
+        os.utime(shapes, ns=(0, 0))
+        assert "two" in load_user_defined_shapes()["Envs"].__fields__
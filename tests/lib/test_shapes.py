@@ -0,0 +1,56 @@
+import sys
+import subprocess
+from types import SimpleNamespace
+import pytest
+from pytest import MonkeyPatch
+from sentential.lib import cache
+from sentential.lib.clients import clients
+from sentential.lib.shapes import Architecture, docker_endpoint
+
+
+@pytest.fixture()
+def docker_info(monkeypatch: MonkeyPatch, tmp_path):
+    calls = []
+
+    def info():
+        calls.append(1)
+        return SimpleNamespace(architecture="aarch64")
+
+    monkeypatch.delenv("SNTL_NO_CACHE", raising=False)
+    monkeypatch.setattr(cache, "SNTL_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(clients.docker.system, "info", info)
+    return calls
+
+
+class TestArchitecture:
+    def test_system_normalizes(self, docker_info):
+        assert Architecture.system() == Architecture.arm64
+
+    def test_system_cached_per_endpoint(self, docker_info, monkeypatch: MonkeyPatch):
+        monkeypatch.setenv("DOCKER_HOST", "tcp://one:2375")
+        Architecture.system()
+        Architecture.system()
+        assert len(docker_info) == 1
+
+        monkeypatch.setenv("DOCKER_HOST", "tcp://two:2375")
+        Architecture.system()
+        assert len(docker_info) == 2
+
+    def test_docker_endpoint_context(self, monkeypatch: MonkeyPatch, tmp_path):
+        monkeypatch.delenv("DOCKER_HOST", raising=False)
+        monkeypatch.delenv("DOCKER_CONTEXT", raising=False)
+        monkeypatch.setenv("DOCKER_CONFIG", str(tmp_path))
+        assert docker_endpoint() == "context:default"
+        tmp_path.joinpath("config.json").write_text('{"currentContext": "colima"}')
+        assert docker_endpoint() == "context:colima"
+
+    def test_cli_import_skips_docker(self):
+        snippet = "\n".join(
+            [
+                "from python_on_whales import docker",
+                "def info(*args, **kwargs): raise SystemExit(3)",
+                "docker.system.info = info",
+                "import sentential.sntl",
+            ]
+        )
+        subprocess.run([sys.executable, "-c", snippet], check=True)
@@ -11,6 +11,7 @@ from sentential.lib.shapes import (
 )
 from sentential.lib.clients import clients
 from tests.helpers import (
+    content_digest,
     generate_image_manifest,
     generate_manifest_list_manifest,
     MockException,
@@ -116,11 +117,11 @@ def manifest_push_mock(manifest_list_uri: str, purge: bool):
                 generate_manifest_list_manifest(manifest_digest, size, arch, os)
             )
 
-    manifest_list = AwsManifestList(manifests=image_distributions)
-
+    manifest_list = json.dumps(AwsManifestList(manifests=image_distributions).dict())
     clients.ecr.put_image(
         repositoryName=repo_name,
-        imageManifest=json.dumps(manifest_list.dict()),
+        imageManifest=manifest_list,
+        imageDigest=content_digest(manifest_list),
         imageTag=manifest_list_tag,
     )
 